@@ -0,0 +1,269 @@
+# Copyright (c) 2016, Martin P. Hellwig, All Rights Reserved.
+"""
+Benchmark module.
+
+Generates synthetic integrator compliant applications in a temporary directory
+and measures how the settings merge and url aggregation scale with them.
+Every integration run is done in a fresh interpreter, so module imports are
+measured cold.
+
+  $ python benchmark.py --apps 10,100,1000
+  $ python benchmark.py --save baseline.json
+  $ python benchmark.py --compare baseline.json
+"""
+# pylint:disable=C0111
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SETTINGS = '''
+INSTALLED_APPS = {installed}
+MIDDLEWARE_CLASSES = {middleware}
+TEMPLATES = {templates}
+DATABASES = {databases}
+ROOT_URLCONF = 'bench_root_urls'
+'''
+
+APP_SETTINGS = '''
+URLCONF = 'urls'
+INSTALLED_APPS = {installed}
+MIDDLEWARE_CLASSES = {middleware}
+TEMPLATES = {templates}
+DATABASES = {databases}
+{name_upper}_OPTION = {index}
+'''
+
+APP_URLS = '''
+from django.urls import path
+from django.http import HttpResponse
+
+def view(request):
+    return HttpResponse('{name}')
+
+urlpatterns = [
+{patterns}
+]
+'''
+
+def _middleware(count):
+    "Return a long list of middleware paths."
+    return ['bench.middleware.Middleware%04d' % index
+            for index in range(count)]
+
+def _databases(count):
+    "Return a large databases dictionary."
+    return dict(('alias%04d' % index,
+                 {'ENGINE':'django.db.backends.sqlite3',
+                  'NAME':'db%04d.sqlite3' % index,
+                  'OPTIONS':{'timeout':index}}) for index in range(count))
+
+def _write(path, text):
+    "Write text to path."
+    with open(path, 'w') as file_write:
+        file_write.write(text)
+
+def generate(directory, apps, middleware=100, databases=50, patterns=20):
+    """Generate the project settings and the applications in directory.
+    Returns the dotted application paths.
+    """
+    base_middleware = _middleware(middleware)
+    _write(os.path.join(directory, 'bench_settings.py'),
+           SETTINGS.format(installed=repr(['django.contrib.contenttypes']),
+                           middleware=repr(base_middleware),
+                           templates=repr([{'BACKEND':'bench.Backend',
+                                            'DIRS':[], 'OPTIONS':{}}]),
+                           databases=repr(_databases(databases))))
+    _write(os.path.join(directory, 'bench_root_urls.py'), 'urlpatterns = []\n')
+
+    names = list()
+    for index in range(apps):
+        name = 'bench_app_%05d' % index
+        path = os.path.join(directory, name)
+        os.mkdir(path)
+        _write(os.path.join(path, '__init__.py'), '')
+
+        # Every application has its own middleware, one in three has to go
+        # before an existing one.
+        middleware_app = ['%s.middleware.Middleware' % name]
+        if index % 3 == 0:
+            middleware_app.append(base_middleware[index % middleware])
+
+        _write(os.path.join(path, 'settings.py'),
+               APP_SETTINGS.format(
+                   installed=repr(['%s_dependency' % name]),
+                   middleware=repr(middleware_app),
+                   templates=repr([{'BACKEND':'%s.Backend' % name}]),
+                   databases=repr(_databases(2)).replace('alias', name),
+                   name_upper=name.upper(), index=index))
+
+        lines = ["    path('%s/%d/', view)," % (name, number)
+                 for number in range(patterns)]
+        _write(os.path.join(path, 'urls.py'),
+               APP_URLS.format(name=name, patterns='\n'.join(lines)))
+        names.append(name)
+
+    return names
+
+def _child(arguments):
+    "Integrate the generated applications, print the measurements as JSON."
+    sys.path.insert(0, arguments.directory)
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+    if arguments.memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    import time
+    start = time.perf_counter()
+    import django_integrator
+    names = arguments.names.split(',')
+    if arguments.batch:
+        django_integrator.add_applications(names, arguments.prefetch)
+    else:
+        for name in names:
+            django_integrator.add_application(name)
+    integrate = time.perf_counter() - start
+
+    # Import the url machinery of Django first, so that only the aggregation
+    # of the application urls is timed.
+    import django.urls # pylint: disable=unused-import
+    start = time.perf_counter()
+    patterns = list()
+    django_integrator.add_urlpatterns(patterns)
+    urls = time.perf_counter() - start
+
+    result = {'integrate':integrate, 'urls':urls}
+    if arguments.memory:
+        result['memory'] = tracemalloc.get_traced_memory()[1]
+    print(json.dumps(result))
+
+def _spawn(directory, names, batch, memory, prefetch=False):
+    "Run an integration in a fresh interpreter and return its measurements."
+    command = [sys.executable, os.path.abspath(__file__), '--child',
+               '--directory', directory, '--names', ','.join(names)]
+    if batch:
+        command.append('--batch')
+    if prefetch:
+        command.append('--prefetch')
+    if memory:
+        command.append('--memory')
+
+    environment = os.environ.copy()
+    environment['PYTHONPATH'] = os.pathsep.join(
+        [HERE] + [_ for _ in [environment.get('PYTHONPATH')] if _])
+    environment.pop('DJANGO_INTEGRATOR_CACHE', None)
+    output = subprocess.check_output(command, env=environment)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+def bench_merge(size, repeat=5):
+    "Measure the merge functions on lists and dictionaries of the given size."
+    from django_integrator import main as integrator
+    source = ['item%06d' % index for index in range(0, size * 2, 2)]
+    target = ['item%06d' % index for index in range(1, size * 2, 2)]
+    source.insert(len(source) // 2, target[len(target) // 2])
+    source_dict = _databases(size)
+    target_dict = dict(('other%06d' % index, index) for index in range(size))
+
+    def list_merge():
+        integrator._merger_list(source, target[::])
+
+    def dict_merge():
+        integrator.merger(source_dict, target_dict.copy())
+
+    results = dict()
+    for name, function in [('list', list_merge), ('dict', dict_merge)]:
+        timer = timeit.Timer(function)
+        number = timer.autorange()[0]
+        results['merge_%s_%d' % (name, size)] = \
+            min(timer.repeat(repeat=repeat, number=number)) / number
+    return results
+
+def run(apps, batch=False, prefetch=False):
+    "Run all benchmarks, return the flat dictionary of measurements."
+    results = dict()
+    for size in [100, 1000, 10000]:
+        results.update(bench_merge(size))
+
+    for count in apps:
+        directory = tempfile.mkdtemp()
+        try:
+            names = generate(directory, count)
+            timing = _spawn(directory, names, batch, False, prefetch)
+            memory = _spawn(directory, names, batch, True, prefetch)
+        finally:
+            shutil.rmtree(directory)
+
+        results['integrate_%d' % count] = timing['integrate']
+        results['urls_%d' % count] = timing['urls']
+        results['memory_%d' % count] = memory['memory']
+    return results
+
+def compare(results, baseline, tolerance):
+    """Print the results next to the baseline.
+    Returns the names of the measurements that regressed beyond tolerance.
+    """
+    regressed = list()
+    for name in sorted(results):
+        value = results[name]
+        base = baseline.get(name)
+        if base is None:
+            print('%-24s %14.6f' % (name, value))
+            continue
+
+        ratio = value / base if base else 1.0
+        mark = ''
+        if ratio > tolerance:
+            mark = ' REGRESSION'
+            regressed.append(name)
+        print('%-24s %14.6f %14.6f %6.2fx%s' % (name, value, base, ratio,
+                                                mark))
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apps', default='10,100,1000',
+        help='Comma separated numbers of applications to integrate.')
+    parser.add_argument('--batch', action='store_true',
+        help='Use add_applications instead of add_application per app.')
+    parser.add_argument('--prefetch', action='store_true',
+        help='Prefetch the application modules, implies --batch.')
+    parser.add_argument('--save', help='Store the results in this file.')
+    parser.add_argument('--compare', help='Compare with this stored file.')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+        help='Allowed slow down ratio against the baseline.')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--directory', help=argparse.SUPPRESS)
+    parser.add_argument('--names', help=argparse.SUPPRESS)
+    parser.add_argument('--memory', action='store_true', help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.child:
+        _child(arguments)
+        return 0
+
+    apps = [int(count) for count in arguments.apps.split(',') if count]
+    batch = arguments.batch or arguments.prefetch
+    results = run(apps, batch, arguments.prefetch)
+
+    baseline = dict()
+    if arguments.compare:
+        with open(arguments.compare, 'r') as file_read:
+            baseline = json.load(file_read)
+    regressed = compare(results, baseline, arguments.tolerance)
+
+    if arguments.save:
+        with open(arguments.save, 'w') as file_write:
+            json.dump(results, file_write, indent=1, sort_keys=True)
+
+    return 1 if len(regressed) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,6 @@
 """Django-Integrator."""
 
-from .main import add_application, add_settings, add_urlpatterns
+from .main import add_application, add_applications, add_settings, \
+                  add_urlpatterns, add_strategy, start_report, get_report, \
+                  start_incremental, reload_settings, finalize, \
+                  preload
@@ -0,0 +1,99 @@
+"""
+Merged settings cache.
+
+When the environment variable DJANGO_INTEGRATOR_CACHE is set to a directory,
+add_applications stores the merged result there. The next start loads that
+result instead of importing and merging the application settings again, as
+long as none of the settings source files changed and the settings that are
+merged have the same value before the merge as when the result was stored.
+Values the application settings derive from environment variables, or other
+state outside their source, are stored as they were computed.
+"""
+import hashlib
+import importlib.util
+import os
+import pickle
+import tempfile
+
+def _source_path(module_path):
+    "Return the source file of the module, without importing the module."
+    try:
+        spec = importlib.util.find_spec(module_path)
+    except ImportError:
+        return None
+
+    if spec is None or not spec.has_location:
+        return None
+    return spec.origin
+
+def digest(module_paths):
+    "Return a hash over the names and source contents of the modules."
+    hasher = hashlib.sha1()
+    for module_path in module_paths:
+        hasher.update(module_path.encode('utf-8') + b'\0')
+        path = _source_path(module_path)
+        if path is None or not os.path.isfile(path):
+            hasher.update(b'\0missing\0')
+            continue
+
+        with open(path, 'rb') as file_read:
+            hasher.update(file_read.read())
+        hasher.update(b'\0')
+
+    return hasher.hexdigest()
+
+def state(values, names):
+    """Return a hash over the values of names, absent ones included.
+    Values without a stable representation never hash the same twice, so
+    they never match a stored state.
+    """
+    hasher = hashlib.sha1()
+    for name in sorted(names):
+        hasher.update(name.encode('utf-8') + b'\0')
+        if name in values:
+            hasher.update(repr(values[name]).encode('utf-8'))
+        else:
+            hasher.update(b'\0missing')
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+def _cache_path(directory, name):
+    "Return the path of the cache file for the settings module name."
+    return os.path.join(directory, name + '.pickle')
+
+def load(directory, name, key):
+    "Return the cached data for name if it was stored with key, else None."
+    try:
+        with open(_cache_path(directory, name), 'rb') as file_read:
+            data = pickle.load(file_read)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            ImportError, IndexError, TypeError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get('key') != key:
+        return None
+    return data['data']
+
+def dump(directory, name, key, data):
+    """Store data for name under key.
+    Returns False if the data can not be pickled, the cache is then skipped.
+    """
+    try:
+        blob = pickle.dumps({'key':key, 'data':data},
+                            protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+
+    os.makedirs(directory, exist_ok=True)
+    # Several workers may start at the same time, write to a temporary file
+    # first so a reader never sees a partial file.
+    handle, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as file_write:
+            file_write.write(blob)
+        os.replace(path, _cache_path(directory, name))
+    except OSError:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    return True
@@ -0,0 +1,60 @@
+"""
+Prefix indexed url dispatch.
+
+Application urls can be mounted under a prefix, the resolver here indexes the
+mounted applications by the first segment of their prefix. A request is then
+only matched against the applications mounted under its first path segment,
+instead of against the patterns of every application.
+"""
+import re
+from django.urls import Resolver404, URLResolver
+from django.urls.resolvers import RegexPattern
+
+def _normalize(prefix):
+    "Return the prefix without leading slash and with a trailing slash."
+    return prefix.strip('/') + '/'
+
+class PrefixResolver(URLResolver):
+    """Resolver that dispatches on the first path segment.
+    The index maps a segment to a resolver holding the mounts under that
+    segment. These resolvers are also its url_patterns, so reversing and the
+    url checks of Django work as with any other resolver.
+    """
+    def __init__(self, index):
+        self.index = index
+        super().__init__(RegexPattern(r'^'), list(index.values()))
+
+    def resolve(self, path):
+        path = str(path)
+        resolver = self.index.get(path.split('/', 1)[0])
+        if resolver is None:
+            raise Resolver404({'path':path, 'tried':[]})
+        return resolver.resolve(path)
+
+def mount(prefix, urlconf):
+    """Return a resolver of urlconf under prefix.
+    The urlconf is either a list of patterns or the dotted path of a urls
+    module, which is then only imported when first needed.
+    """
+    pattern = RegexPattern('^' + re.escape(_normalize(prefix)))
+    return URLResolver(pattern, urlconf)
+
+def build(mounts):
+    """Return a PrefixResolver for the list of (prefix, urlconf) mounts.
+    Raises ValueError if two mounts have the same prefix.
+    """
+    index = dict()
+    seen = dict()
+    for prefix, urlconf in mounts:
+        prefix = _normalize(prefix)
+        if prefix in seen:
+            text = 'Url prefix %s is mounted by both %s and %s.'
+            raise ValueError(text % (prefix, seen[prefix], urlconf))
+        seen[prefix] = urlconf
+
+        segment = prefix.split('/', 1)[0]
+        index.setdefault(segment, list()).append(mount(prefix, urlconf))
+
+    for segment in index:
+        index[segment] = URLResolver(RegexPattern(r'^'), index[segment])
+    return PrefixResolver(index)
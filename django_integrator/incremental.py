@@ -0,0 +1,235 @@
+"""
+Incremental re-merge of changed settings.
+
+The ledger records which settings module contributed which settings, which
+dictionary entries and which list items. When one settings module changes,
+only its contributions are backed out of the target and its new values are
+merged in again, instead of restarting and merging every application.
+Settings with a merge strategy are recomputed instead, by running the strategy
+over their original value and the values of the remaining modules.
+"""
+import copy
+
+_MISSING = object()
+
+# Settings Django reads once at start up, a change to these still needs a
+# restart of the process.
+RESTART = ['INSTALLED_APPS', 'MIDDLEWARE', 'MIDDLEWARE_CLASSES', 'DATABASES',
+           'TEMPLATES', 'ROOT_URLCONF', 'URLCONF', 'URLPREFIX', 'CACHES']
+
+def _item_key(item):
+    "Return a hashable key for a list item."
+    try:
+        hash(item)
+    except TypeError:
+        return repr(item)
+    return item
+
+
+class Ledger(object):
+    "Record of the contributions of each settings module."
+    def __init__(self):
+        # (key,) or (key, sub key) -> list of [path, value] in merge order
+        self.writers = dict()
+        # key -> {item key: [paths]} for merged lists
+        self.items = dict()
+        # the value before any contribution, per writers or items key
+        self.origin = dict()
+        # path -> the urls module added by its URLCONF
+        self.patterns = dict()
+        # path -> position in the order the modules were first merged
+        self.order = dict()
+        # key -> merge strategy, for the settings that are recomputed
+        self.strategies = dict()
+
+    def record(self, path, key, value, target, mergable, strategy=None):
+        """Record that the settings module at path contributes key=value.
+        A mergable setting with a strategy is recorded as a whole.
+        """
+        self.order.setdefault(path, len(self.order))
+        if mergable and strategy is not None:
+            if (key,) not in self.origin:
+                self.origin[(key,)] = copy.deepcopy(target.get(key, _MISSING))
+            self.strategies[key] = strategy
+            self._write((key,), path, value, _MISSING)
+        elif mergable and isinstance(value, (list, tuple)):
+            if key not in self.origin:
+                self.origin[key] = set(_item_key(item)
+                                       for item in target.get(key, ()))
+            items = self.items.setdefault(key, dict())
+            for item in value:
+                paths = items.setdefault(_item_key(item), list())
+                if path not in paths:
+                    paths.append(path)
+        elif mergable and isinstance(value, dict):
+            for sub_key in value:
+                self._write((key, sub_key), path, value[sub_key],
+                            target.get(key, dict()).get(sub_key, _MISSING))
+        else:
+            self._write((key,), path, value, target.get(key, _MISSING))
+
+    def paths(self):
+        "Return the paths of all recorded settings modules."
+        paths = set(self.patterns)
+        for name in self.writers:
+            paths.update(writer[0] for writer in self.writers[name])
+        for key in self.items:
+            for item_key in self.items[key]:
+                paths.update(self.items[key][item_key])
+        return paths
+
+    def keys(self, path):
+        "Return the keys the settings module at path contributed to."
+        keys = set()
+        for name in self.writers:
+            if any(writer[0] == path for writer in self.writers[name]):
+                keys.add(name[0])
+        for key in self.items:
+            if any(path in paths for paths in self.items[key].values()):
+                keys.add(key)
+        return keys
+
+    def _write(self, name, path, value, origin):
+        """Record a single writer of name.
+        Writers are kept in the order their modules were first merged, so a
+        re-merged module does not win from modules merged after it.
+        """
+        if name not in self.origin:
+            self.origin[name] = origin
+        writers = self.writers.setdefault(name, list())
+        index = len(writers)
+        while index > 0 and self.order[writers[index - 1][0]] > \
+                            self.order[path]:
+            index -= 1
+        writers.insert(index, [path, value])
+
+    def _recompute(self, key, target):
+        """Set key in target to its strategy run over the origin and the
+        values of the remaining writers. Lists and dicts are updated in place.
+        """
+        value = self.origin[(key,)]
+        if value is _MISSING:
+            target.pop(key, None)
+            return
+
+        value = copy.deepcopy(value)
+        sources = [writer[1] for writer in self.writers[(key,)]]
+        if len(sources) > 0:
+            self.strategies[key](sources, value)
+
+        current = target.get(key)
+        if isinstance(current, list) and isinstance(value, list):
+            current[::] = value
+        elif isinstance(current, dict) and isinstance(value, dict):
+            current.clear()
+            current.update(value)
+        else:
+            target[key] = value
+
+    def _set(self, name, target):
+        "Set the value of the last writer of name, or the origin, in target."
+        if name[0] in self.strategies:
+            self._recompute(name[0], target)
+            return
+
+        writers = self.writers[name]
+        value = writers[-1][1] if writers else self.origin[name]
+        if len(name) == 1:
+            container, key = target, name[0]
+        else:
+            container, key = target[name[0]], name[1]
+
+        if value is _MISSING:
+            container.pop(key, None)
+        else:
+            container[key] = value
+
+    def settle(self, path, target):
+        "Set the values written by path to those of their last writer."
+        for name in self.writers:
+            if any(writer[0] == path for writer in self.writers[name]):
+                self._set(name, target)
+
+    def back_out(self, path, target):
+        """Remove the contributions of path from target.
+        Returns the set of changed keys.
+        """
+        changed = set()
+        for name in self.writers:
+            writers = self.writers[name]
+            if not any(writer[0] == path for writer in writers):
+                continue
+
+            writers[:] = [writer for writer in writers if writer[0] != path]
+            changed.add(name[0])
+            self._set(name, target)
+
+        for key in self.items:
+            items = self.items[key]
+            remove = set()
+            for item_key in items:
+                paths = items[item_key]
+                if path not in paths:
+                    continue
+                paths.remove(path)
+                if len(paths) == 0 and item_key not in self.origin[key]:
+                    remove.add(item_key)
+
+            if len(remove) > 0:
+                changed.add(key)
+                target[key][::] = [item for item in target[key]
+                                   if _item_key(item) not in remove]
+                for item_key in remove:
+                    del items[item_key]
+
+        return changed
+
+
+def connect(importer):
+    """Connect to the file_changed signal of the Django autoreloader.
+    When a tracked settings module changes, it is re-merged in place and
+    the restart is skipped, unless a setting in RESTART changed.
+    """
+    from django.utils import autoreload
+
+    def receiver(sender, file_path, **kwargs): # pylint: disable=W0613
+        "Re-merge a changed settings module."
+        if importer.ledger is None:
+            return None
+        settings_path = importer.tracked_file(str(file_path))
+        if settings_path is None:
+            return None
+
+        changed = importer.remerge(settings_path)
+        if any(key in RESTART for key in changed):
+            return None
+
+        _apply(importer.settings['TARGET'], changed)
+        return True
+
+    autoreload.file_changed.connect(receiver, weak=False,
+                                    dispatch_uid='django_integrator')
+    return receiver
+
+def disconnect():
+    "Disconnect from the file_changed signal, see connect."
+    from django.utils import autoreload
+    autoreload.file_changed.disconnect(dispatch_uid='django_integrator')
+
+def _apply(target, changed):
+    "Update the configured Django settings with the changed keys."
+    # pylint: disable=protected-access
+    from django.conf import settings
+    from django.test.signals import setting_changed
+    if not settings.configured:
+        return
+
+    for key in changed:
+        if not key.isupper():
+            continue
+        if key in target:
+            setattr(settings, key, target[key])
+        elif hasattr(settings, key):
+            delattr(settings, key)
+        setting_changed.send(sender=settings._wrapped.__class__,
+                             setting=key, value=target.get(key), enter=False)
@@ -2,21 +2,103 @@
 Main module.
 """
 
+import collections.abc
+import copy
 import importlib
 import os
+import sys
+import types
+from . import report
 
 MERGABLES = ['INSTALLED_APPS', 'MIDDLEWARE_CLASSES', 'TEMPLATES', 'DATABASES']
 _PATTERNS = []
+_PREFIXES = {}
+_REPORT = report.Report()
+_ABSENT = object()
+# Set by the Django autoreloader in the process that serves, it watches the
+# files of the imported modules.
+_AUTORELOAD = 'RUN_MAIN'
 
-def _merger_list(source, target):
-    "Merges list items from the source into target."
-    # If an item in source is already in target, then the item before it will be
-    # inserted before in the target, for example a source of
-    # source = [nil, one, last]
-    # target = [first, one, two]
-    #
-    # will result in:
-    # target = [first, nil, one, two, last]
+class _ListMerge(object):
+    """Merge one or more source lists into a target list.
+
+    Instead of searching and inserting into the target for every source item,
+    the items already present are kept in a set and the new items in a
+    'place before' mapping keyed by the item they must precede. The target is
+    then rebuilt once by apply(), which makes a merge linear in the combined
+    length of source and target.
+    """
+    def __init__(self, target):
+        self.target = target
+        self.present = set(target)
+        self.before = dict()
+        self.tail = list()
+        self.added = list()
+
+    def add(self, source):
+        "Add the items of source to the pending merge."
+        # Same walk as the original insert based merge, from the back of the
+        # source, an item directly followed by an existing item is placed
+        # before that item, other new items are appended in source order.
+        anchor = None
+        tail = list()
+        for item in reversed(source):
+            if item in self.present:
+                anchor = item
+                continue
+
+            self.present.add(item)
+            self.added.append(item)
+            if anchor is None:
+                tail.append(item)
+            else:
+                self.before.setdefault(anchor, list()).append(item)
+                anchor = None
+
+        tail.reverse()
+        self.tail.extend(tail)
+        return self
+
+    def _emit(self, item, result):
+        "Append item to result, preceded by the items placed before it."
+        stack = [item]
+        while len(stack) > 0:
+            items = self.before.pop(stack[-1], None)
+            if items is None:
+                result.append(stack.pop())
+            else:
+                stack.extend(items[::-1])
+
+    def apply(self):
+        "Write the pending merge into the target, return the changes."
+        if len(self.before) == 0:
+            self.target.extend(self.tail)
+        else:
+            result = list()
+            for item in self.target + self.tail:
+                self._emit(item, result)
+            self.target[:] = result
+
+        changes = [(item, _ABSENT) for item in self.added]
+        self.before = dict()
+        self.tail = list()
+        self.added = list()
+        return changes
+
+
+def _hashable(items):
+    "Return True if all items can be used in a set."
+    try:
+        set(items)
+    except TypeError:
+        return False
+    return True
+
+def _merger_list_sequential(source, target):
+    """Merges list items from the source into target, item by item.
+    Returns the (added item, absent) pairs.
+    """
+    added = list()
     items = source[::-1]
     index = None
     insert = len(target)
@@ -24,67 +106,398 @@ def _merger_list(source, target):
         item = items.pop(0)
         if item in target:
             index = target.index(item)
-        elif index is None:
+            continue
+
+        added.append((item, _ABSENT))
+        if index is None:
             target.insert(insert, item)
         else:
             target.insert(index, item)
+            if index < insert:
+                insert += 1
             index = None
+    return added
+
+def _merger_list(source, target):
+    "Merges list items from the source into target, returns the changes."
+    # If an item in source is already in target, then the item before it will be
+    # inserted before in the target, for example a source of
+    # source = [nil, one, last]
+    # target = [first, one, two]
+    #
+    # will result in:
+    # target = [first, nil, one, two, last]
+    #
+    # Items that can not be hashed (like the dicts in TEMPLATES) are merged
+    # item by item, as these lists are short anyway.
+    if _hashable(source) and _hashable(target):
+        return _ListMerge(target).add(source).apply()
+    return _merger_list_sequential(source, target)
 
 def _merger_dict(source, target):
-    "Merges dict items from the source into target."
+    """Merges dict items from the source into target.
+    Returns the (key, previous value) pairs of the replaced and added keys.
+    """
+    replaced = [(key, target.get(key, _ABSENT)) for key in source]
     target.update(source)
+    return replaced
+
+def _compact(value):
+    "Return an immutable version of value with interned strings."
+    if isinstance(value, str):
+        return sys.intern(value)
+    elif isinstance(value, (list, tuple)):
+        return tuple(_compact(item) for item in value)
+    elif isinstance(value, dict):
+        return types.MappingProxyType(dict((_compact(key), _compact(item))
+                                           for key, item in value.items()))
+    return value
+
+def _merged(source, target):
+    """Return source deep merged over target, without changing either.
+    Only the dictionaries and lists along the merged path are copied, the
+    values not touched by source are shared with target.
+    """
+    if isinstance(source, dict) and isinstance(target, dict):
+        result = dict(target)
+        for key in source:
+            if key in result:
+                result[key] = _merged(source[key], result[key])
+            else:
+                result[key] = source[key]
+        return result
+    elif isinstance(source, (list, tuple)) and isinstance(target, (list, tuple)):
+        result = list(target)
+        _merger_list(source, result)
+        return result
+    return source
+
+def merger_all(sources, target):
+    """Merge all sources into target in a single pass.
+    This is the strategy of a mergable setting without its own strategy.
+    Returns the changes like merger does.
+    """
+    lists = all(isinstance(source, (list, tuple)) for source in sources)
+    if lists and _hashable(target) and all(_hashable(_) for _ in sources):
+        merge = _ListMerge(target)
+        for source in sources:
+            merge.add(source)
+        return merge.apply()
+
+    changes = list()
+    for source in sources:
+        changes.extend(merger(source, target))
+    return changes
+
+def merger_unique(sources, target):
+    """Append the items of all sources not yet in the target list.
+    Unlike merger_all the items are not placed relative to existing items,
+    which makes it a single pass over the sources.
+    Returns the (added item, absent) pairs.
+    """
+    changes = list()
+    present = set()
+    for item in target:
+        try:
+            present.add(item)
+        except TypeError:
+            pass
+
+    for source in sources:
+        for item in source:
+            try:
+                if item in present:
+                    continue
+                present.add(item)
+            except TypeError:
+                # Items that can not be hashed are compared one by one.
+                if item in target:
+                    continue
+            target.append(item)
+            changes.append((item, _ABSENT))
+    return changes
+
+def merger_deep(sources, target):
+    """Deep merge the entries of all source dicts into the target dict.
+    An entry that is already in the target is replaced by a deep merged copy,
+    so the values of DATABASES can add to an alias without repeating it.
+    Returns the (key, previous value) pairs.
+    """
+    changes = list()
+    for source in sources:
+        for key in source:
+            previous = target.get(key, _ABSENT)
+            if previous is _ABSENT:
+                target[key] = source[key]
+            else:
+                target[key] = _merged(source[key], previous)
+            changes.append((key, previous))
+    return changes
+
+def merger_by_backend(sources, target):
+    """Deep merge the entries of all source lists into the target list by
+    their BACKEND, as used by TEMPLATES. An entry with a new BACKEND is added.
+    Returns the (entry, previous entry) pairs, previous is absent if added.
+    """
+    changes = list()
+    index = dict()
+    for position, entry in enumerate(target):
+        index.setdefault(entry.get('BACKEND'), position)
+
+    for source in sources:
+        for entry in source:
+            backend = entry.get('BACKEND')
+            if backend not in index:
+                index[backend] = len(target)
+                target.append(entry)
+                changes.append((entry, _ABSENT))
+                continue
+
+            previous = target[index[backend]]
+            target[index[backend]] = _merged(entry, previous)
+            changes.append((target[index[backend]], previous))
+    return changes
+
+STRATEGIES = {'TEMPLATES':merger_by_backend, 'DATABASES':merger_deep}
 
 def merger(source, target):
-    "Merge source into target"
+    """Merge source into target.
+    Returns the (added item, absent) pairs for a list, or the
+    (key, previous value) pairs for a dict.
+    """
     if isinstance(source, (list, tuple)):
-        _merger_list(source, target)
+        return _merger_list(source, target)
     elif isinstance(source, dict):
-        _merger_dict(source, target)
+        return _merger_dict(source, target)
     else:
         text = "Merging of source type %s not implemented." % type(source)
         raise NotImplementedError(text)
 
 
+def _last_index(items, item):
+    "Return the index of the last occurrence of item in items, or None."
+    for index in range(len(items) - 1, -1, -1):
+        if items[index] is item:
+            return index
+    for index in range(len(items) - 1, -1, -1):
+        if items[index] == item:
+            return index
+    return None
+
+
+class _Snapshot(object):
+    """Original state of a mergable list or dict, recorded without copying.
+    Merging only adds or replaces items of a list and only sets keys of a
+    dict, so the original is the current value without the added items and
+    with the previous values of the replaced ones. The copy is only made by
+    materialize, when a value is actually restored.
+    Only the merges are undone. Merges never change nested values in place,
+    the deep strategies merge into copies, so the nested dicts of TEMPLATES
+    and DATABASES are restored as they were. Changes the settings module
+    itself makes after the first merge, like appending to INSTALLED_APPS or
+    setting an entry of DATABASES['default'], are part of the live value and
+    are kept.
+    """
+    def __init__(self, value):
+        self.value = value
+        # the (entry, previous) changes of a list in the order they were made
+        self.added = list()
+        self.replaced = dict()
+
+    def record(self, changes):
+        "Record the changes returned by a merge into the value."
+        if isinstance(self.value, dict):
+            for key, previous in changes:
+                self.replaced.setdefault(key, previous)
+        else:
+            self.added.extend(changes)
+
+    def materialize(self):
+        "Return a deep copy of the original value."
+        if isinstance(self.value, dict):
+            value = dict(self.value)
+            for key in self.replaced:
+                if self.replaced[key] is _ABSENT:
+                    value.pop(key, None)
+                else:
+                    value[key] = self.replaced[key]
+        else:
+            # Undo the changes from the last one. Equal strings can be the
+            # same object, so a changed entry is its last occurrence.
+            value = list(self.value)
+            for item, previous in reversed(self.added):
+                index = _last_index(value, item)
+                if index is None:
+                    continue
+                if previous is _ABSENT:
+                    del value[index]
+                else:
+                    value[index] = previous
+            if isinstance(self.value, tuple):
+                value = tuple(value)
+        return copy.deepcopy(value)
+
+
+def _original(value):
+    "Return the original value of an ORIGIN entry."
+    if isinstance(value, _Snapshot):
+        return value.materialize()
+    return value
+
+
 class _Importer(object):
     "Imports django apps and merges settings."
     def __init__(self):
         self.settings = {'ORIGIN':{}}
-        self.settings['TARGET'] = \
-                     self.import_(os.environ['DJANGO_SETTINGS_MODULE']).__dict__
+        self.path = os.environ['DJANGO_SETTINGS_MODULE']
+        self.settings['TARGET'] = self.import_(self.path).__dict__
         self._first_merge = True
+        self.ledger = None
+        self.merged = set()
+        self.final = None
+
+    def _check_open(self):
+        "Raise an error if the integration is finalized."
+        if self.final is not None:
+            raise RuntimeError('The integration is finalized, settings can '
+                               'no longer be merged or restored.')
 
     def merge(self, additional_settings, path):
         "Merge additional_settings into globals()."
-        for key in additional_settings.__dict__:
-            if key.startswith('_'):
-                continue
+        return self.merge_all([(additional_settings.__dict__, path)])
+
+    def merge_all(self, entries):
+        """Merge a list of (settings dictionary, path) entries into globals().
+        The mergable settings of all entries are collected first and then
+        merged into the target in a single pass per setting.
+        Returns the keys that were set or merged.
+        """
+        self._check_open()
+        pending = dict()
+        for values, path in entries:
+            for key in values:
+                if key.startswith('_'):
+                    continue
+
+                value = values[key]
+
+                if self.ledger is not None:
+                    self.ledger.record(path, key, value,
+                                       self.settings['TARGET'],
+                                       key in MERGABLES, STRATEGIES.get(key))
 
-            value = additional_settings.__dict__[key]
+                if key == 'URLCONF':
+                    module_path = path.split('.', 1)[0] + '.' + value
+                    _PATTERNS.append(module_path)
+                    if self.ledger is not None:
+                        self.ledger.patterns[path] = module_path
+                elif key == 'URLPREFIX':
+                    _PREFIXES[path.split('.', 1)[0]] = value
+                elif self._first_merge and key not in pending \
+                                        and key in self.settings['TARGET']:
+                    if key not in self.settings['ORIGIN']:
+                        _ = self.settings['TARGET'][key]
+                        if key in MERGABLES:
+                            if isinstance(_, (list, tuple, dict)):
+                                _ = _Snapshot(_)
+                        self.settings['ORIGIN'][key] = _
 
-            if key == 'URLCONF':
-                path = path.split('.', 1)[0]
-                _PATTERNS.append(path + '.' + value)
-            elif self._first_merge and key in self.settings['TARGET']:
-                _ = self.settings['TARGET'][key]
                 if key in MERGABLES:
-                    if isinstance(_, (list, tuple)):
-                        _ = _[::]
-                    elif isinstance(_, dict):
-                        _ = _.copy()
-                self.settings['ORIGIN'][key] = _
-
-            if key in MERGABLES:
-                merger(value, self.settings['TARGET'][key])
-            else:
-                self.settings['TARGET'][key] = value
+                    pending.setdefault(key, list()).append(value)
+                else:
+                    pending[key] = None
+                    self.settings['TARGET'][key] = value
+
+        for key in MERGABLES:
+            if key in pending:
+                strategy = STRATEGIES.get(key, merger_all)
+                changes = strategy(pending[key], self.settings['TARGET'][key])
+                self._record(key, changes)
 
         if self._first_merge:
             self._first_merge = False
 
+        self.merged.update(pending)
+        return list(pending.keys())
+
+    def _record(self, key, changes):
+        "Record merge changes of key on its snapshot in ORIGIN, if any."
+        snapshot = self.settings['ORIGIN'].get(key)
+        if isinstance(snapshot, _Snapshot) and \
+           snapshot.value is self.settings['TARGET'][key]:
+            snapshot.record(changes)
+
+    def track(self):
+        """Record the contributions of every settings module merged from now
+        on, so that a single module can be merged again with remerge.
+        """
+        self._check_open()
+        if self.ledger is None:
+            from . import incremental
+            self.ledger = incremental.Ledger()
+            incremental.connect(self)
+
+    def tracked_file(self, file_path):
+        "Return the path of the tracked settings module stored in file_path."
+        file_path = os.path.realpath(file_path)
+        for path in self.ledger.paths():
+            module = self.settings.get(path)
+            module_file = getattr(module, '__file__', None)
+            if module_file and os.path.realpath(module_file) == file_path:
+                return path
+        return None
+
+    def remerge(self, settings_path):
+        """Back out the contributions of the settings module at settings_path,
+        then reload and merge it again. Returns the set of changed keys.
+        """
+        # pylint: disable=protected-access
+        from .incremental import _MISSING
+        self._check_open()
+        target = self.settings['TARGET']
+        module = self.settings.get(settings_path)
+        if module is None:
+            module = self.import_(settings_path)
+        else:
+            # Reloading keeps names that were removed from the source.
+            for key in list(module.__dict__):
+                if not key.startswith('__'):
+                    del module.__dict__[key]
+            module = importlib.reload(module)
+            self.settings[settings_path] = module
+
+        keys = self.ledger.keys(settings_path)
+        keys.update(key for key in module.__dict__ if not key.startswith('_'))
+        for key in keys:
+            # The recomputed values no longer match the logged merges.
+            if key in self.settings['ORIGIN']:
+                self.settings['ORIGIN'][key] = \
+                    _original(self.settings['ORIGIN'][key])
+        before = dict()
+        for key in keys:
+            value = target.get(key, _MISSING)
+            if isinstance(value, (list, dict)):
+                value = value.copy()
+            before[key] = value
+
+        self.ledger.back_out(settings_path, target)
+        module_path = self.ledger.patterns.pop(settings_path, None)
+        if module_path in _PATTERNS:
+            _PATTERNS.remove(module_path)
+        self.merge_all([(module.__dict__, settings_path)])
+        self.ledger.settle(settings_path, target)
+
+        return set(key for key in keys
+                   if target.get(key, _MISSING) != before[key])
+
     def restore(self, key):
-        "Restore value from original"
-        value = self.settings['ORIGIN'][key][::]
-        self.settings['TARGET'][key] = value
+        """Restore value from original, which undoes the merges into it, see
+        _Snapshot."""
+        self._check_open()
+        value = _original(self.settings['ORIGIN'][key])
+        # Keep the materialized original for later restores.
+        self.settings['ORIGIN'][key] = value
+        self.settings['TARGET'][key] = copy.deepcopy(value)
 
     def import_(self, module_path_string):
         "Import using the module_path_string"
@@ -92,32 +505,394 @@ class _Importer(object):
                                      importlib.import_module(module_path_string)
         return self.settings[module_path_string]
 
+    def _start(self, call, path):
+        "Start recording a step on the report."
+        return _REPORT.start(call, path, self.settings['TARGET'], MERGABLES)
+
     def __call__(self, application_path):
         "Import using the module_path_string and merge into settings"
-        self.settings['TARGET']['INSTALLED_APPS'].append(application_path)
+        self._check_open()
+        entry = self._start('add_application', application_path)
+        applications = self.settings['TARGET']['INSTALLED_APPS']
+        # An application that is already installed is not added twice, like
+        # the merge of add_applications does.
+        if application_path not in applications:
+            applications.append(application_path)
+            self._record('INSTALLED_APPS', [(application_path, _ABSENT)])
         settings_path = application_path + '.settings'
         settings = self.import_(settings_path)
-        self.merge(settings, settings_path)
+        entry.lap('import')
+        keys = self.merge(settings, settings_path)
+        entry.lap('merge')
+        entry.finish(keys=len(keys))
+
+    def add(self, settings_path):
+        "Import the settings module by path and merge into settings."
+        entry = self._start('add_settings', settings_path)
+        settings = self.import_(settings_path)
+        entry.lap('import')
+        keys = self.merge(settings, settings_path)
+        entry.lap('merge')
+        entry.finish(keys=len(keys))
+
+    def call_all(self, application_paths, prefetch=False):
+        """Import all applications first and merge their settings in one pass.
+        With prefetch set the settings and urls modules of all applications
+        are located and read concurrently before importing them in order.
+        """
+        self._check_open()
+        directory = os.environ.get('DJANGO_INTEGRATOR_CACHE', '')
+        if directory:
+            # Only pay for the cache imports when it is used.
+            from . import cache
+            entry = self._start('add_applications', None)
+            key = cache.digest([self.path] + [path + '.settings'
+                                              for path in application_paths])
+            data = cache.load(directory, self.path, key)
+            # The stored values include what was merged before, like the
+            # modules of add_settings, which has to be the same again.
+            if data is not None and data.get('state') != \
+               cache.state(self.settings['TARGET'], data['values']):
+                data = None
+            if self._restore_cached(data):
+                entry.lap('cache')
+                entry.finish(keys=0)
+                return
+
+        if prefetch:
+            from . import prefetch as prefetcher
+            entry = self._start('prefetch', None)
+            prefetcher.warm([path + '.' + name for path in application_paths
+                             for name in ['settings', 'urls']])
+            entry.lap('prefetch')
+            entry.finish(keys=0)
+
+        origin = set(self.settings['ORIGIN'].keys())
+        patterns = len(_PATTERNS)
+        entries = list()
+        for application_path in application_paths:
+            settings_path = application_path + '.settings'
+            entry = self._start('add_applications', application_path)
+            settings = self.import_(settings_path)
+            entry.lap('import')
+            entry.finish(keys=len([key for key in settings.__dict__
+                                   if not key.startswith('_')]))
+            entries.append(({'INSTALLED_APPS':[application_path]},
+                            application_path))
+            entries.append((settings.__dict__, settings_path))
+
+        before = None
+        if directory:
+            before = cache.state(self.settings['TARGET'],
+                                 set(name for values, _ in entries
+                                     for name in values
+                                     if not name.startswith('_')))
+
+        entry = self._start('add_applications', None)
+        keys = self.merge_all(entries)
+        entry.lap('merge')
+        entry.finish(keys=len(keys))
+
+        if directory:
+            data = {'values':dict(), 'origin':dict(),
+                    'patterns':_PATTERNS[patterns:],
+                    'prefixes':_PREFIXES.copy(), 'state':before}
+            for name in keys:
+                data['values'][name] = self.settings['TARGET'][name]
+            for name in self.settings['ORIGIN']:
+                if name not in origin:
+                    data['origin'][name] = \
+                                    _original(self.settings['ORIGIN'][name])
+            cache.dump(directory, self.path, key, data)
+
+    def _restore_cached(self, data):
+        "Apply cached merge data, returns False if there was nothing cached."
+        if data is None:
+            return False
+
+        self.settings['TARGET'].update(data['values'])
+        self.merged.update(data['values'])
+        for key in data['origin']:
+            self.settings['ORIGIN'].setdefault(key, data['origin'][key])
+        _PATTERNS.extend(data['patterns'])
+        _PREFIXES.update(data.get('prefixes', dict()))
+        self._first_merge = False
+        return True
+
+    def finalize(self):
+        """Freeze the merged settings, see the finalize function.
+        Returns the frozen mapping of the merged settings.
+        """
+        if self.final is not None:
+            return self.final
+
+        target = self.settings['TARGET']
+        values = dict()
+        for key in self.merged.union(MERGABLES):
+            if key not in target:
+                continue
+            value = target[key]
+            # Dictionaries and their entries stay mutable in the target, as
+            # Django fills in defaults for some of them, the frozen mapping
+            # only holds a read only view of them instead of a copy.
+            if isinstance(value, dict):
+                values[key] = types.MappingProxyType(value)
+            elif isinstance(value, (list, tuple)) and not _hashable(value):
+                values[key] = tuple(value)
+            else:
+                # Lists of plain items become the shared tuple.
+                values[key] = _compact(value)
+                target[key] = values[key]
+        self.final = types.MappingProxyType(values)
+
+        # The autoreloader only watches modules that are still imported.
+        release = not os.environ.get(_AUTORELOAD)
+        for path in list(self.settings):
+            if path in ['ORIGIN', 'TARGET', self.path]:
+                continue
+            module = self.settings.pop(path)
+            if release and sys.modules.get(path) is module:
+                del sys.modules[path]
+                parent, _, name = path.rpartition('.')
+                if getattr(sys.modules.get(parent), name, None) is module:
+                    delattr(sys.modules[parent], name)
+
+        self.settings['ORIGIN'] = dict()
+        if self.ledger is not None:
+            from . import incremental
+            incremental.disconnect()
+        self.ledger = None
+        self.merged = set()
+        return self.final
+
+class _Lazy(object):
+    """Create the wrapped object on first use.
+    This keeps importing django_integrator free of importing the settings of
+    DJANGO_SETTINGS_MODULE until the integrator is actually used.
+    """
+    def __init__(self, factory):
+        self._factory = factory
+        self._wrapped = None
+
+    def _resolve(self):
+        "Return the wrapped object, create it if needed."
+        if self._wrapped is None:
+            self._wrapped = self._factory()
+        return self._wrapped
+
+    def reset(self):
+        "Drop the wrapped object, it is created again on next use."
+        self._wrapped = None
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+_IMPORTER = _Lazy(_Importer)
 
-_IMPORTER = _Importer()
+
+class _Target(collections.abc.MutableMapping):
+    "Lazily resolved handle on the settings of DJANGO_SETTINGS_MODULE."
+    # pylint: disable=no-member
+    def __getitem__(self, key):
+        return _IMPORTER.settings['TARGET'][key]
+
+    def __setitem__(self, key, value):
+        _IMPORTER.settings['TARGET'][key] = value
+
+    def __delitem__(self, key):
+        del _IMPORTER.settings['TARGET'][key]
+
+    def __iter__(self):
+        return iter(_IMPORTER.settings['TARGET'])
+
+    def __len__(self):
+        return len(_IMPORTER.settings['TARGET'])
+
+TARGET = _Target()
 
 def add_application(application_dot_path):
     """Import the application by the given dot path.
-    If the application has a settings file/module, merge it in.
+    If the application has a settings file/module, merge it in. An application
+    already in INSTALLED_APPS is not added again.
     """
     _IMPORTER(application_dot_path)
 
+def add_applications(application_dot_paths, prefetch=False):
+    """Import all applications by the given dot paths.
+    The settings of all applications are merged in a single pass, the result
+    is the same as calling add_application for each path in the given order.
+    With prefetch set, the settings and urls modules of the applications are
+    located and read concurrently first, to overlap file system latency.
+    """
+    _IMPORTER.call_all(application_dot_paths, prefetch)
+
 def add_settings(settings_dot_path):
     "Merge the settings in."
-    settings = _IMPORTER.import_(settings_dot_path)
-    _IMPORTER.merge(settings, settings_dot_path)
+    _IMPORTER.add(settings_dot_path)
+
+def add_strategy(key, strategy):
+    """Merge the setting key with strategy, instead of the default ordered
+    merge of lists or update of dicts. The strategy is called with the list of
+    all source values and the target value, which it changes in place, and
+    returns the changes like merger_all does. Registering makes the setting
+    mergable, a strategy of None restores the default merge.
+    """
+    if strategy is None:
+        STRATEGIES.pop(key, None)
+    else:
+        STRATEGIES[key] = strategy
+    if key not in MERGABLES:
+        MERGABLES.append(key)
+
+
+def _lazy_include(module_path):
+    """Return a resolver for the urls module at module_path.
+    Django only imports the module of a resolver given by its dotted path
+    when its patterns are needed, for example when a request reaches it. The
+    resolver matches every path, so it is reached by every request that the
+    resolvers before it do not match.
+    """
+    from django.urls import URLResolver
+    from django.urls.resolvers import RegexPattern
+    return URLResolver(RegexPattern(r'^'), module_path)
+
+def _urlpatterns(module_path):
+    "Import the urls module at module_path and return its urlpatterns."
+    entry = _REPORT.start('add_urlpatterns', module_path)
+    module = importlib.import_module(module_path)
+    entry.lap('import')
+    entry.finish(patterns=len(module.urlpatterns))
+    return module.urlpatterns
+
+def add_urlpatterns(patterns, lazy=False, indexed=False):
+    """Add urlpatterns to given patterns.
+    With lazy set, each application urls module is added as a resolver that
+    imports the module on the first request that reaches it, instead of
+    importing all modules now. Without a mount point every request reaches
+    the applications added before the matching one, and a not found request
+    reaches all of them, so this only avoids imports with indexed set.
+    With indexed set, each application is mounted under its URLPREFIX
+    setting, or its name if it has none, and the mounted applications are
+    dispatched on the first path segment. Applications with an empty
+    URLPREFIX are added without a mount point.
+    """
+    mounts = list()
+    position = None
+    for module_path in _PATTERNS:
+        if indexed:
+            application = module_path.split('.', 1)[0]
+            prefix = _PREFIXES.get(application, application)
+            if prefix.strip('/'):
+                if position is None:
+                    position = len(patterns)
+                urlconf = module_path if lazy else _urlpatterns(module_path)
+                mounts.append((prefix, urlconf))
+                continue
+
+        if lazy:
+            patterns.append(_lazy_include(module_path))
+        else:
+            patterns.extend(_urlpatterns(module_path))
 
+    if len(mounts) > 0:
+        from . import dispatch
+        patterns.insert(position, dispatch.build(mounts))
+    _REPORT.flush()
+
+def start_incremental():
+    """Track the settings merged from now on for incremental re-merges.
+    Call this before adding the applications. When the Django autoreloader
+    detects a change in a tracked settings module, only that module is merged
+    again and the restart is skipped, unless a setting changed that Django
+    only reads at start up, like INSTALLED_APPS.
+    """
+    _IMPORTER.track()
+
+def reload_settings(settings_dot_path):
+    """Merge the tracked settings module at settings_dot_path again.
+    Returns the set of setting names that changed.
+    """
+    return _IMPORTER.remerge(settings_dot_path)
+
+def finalize():
+    """Finish the integration and release what is only needed to merge.
+    The merged settings are frozen into an immutable mapping, which is
+    returned. Lists of plain items in the settings are replaced by tuples and
+    their strings are interned. Dictionaries, like DATABASES, and the entries
+    of lists like TEMPLATES stay the mutable objects of the settings module,
+    the mapping holds read only views of them. The application settings
+    modules and the saved originals are released. Merging or restoring afterwards raises a
+    RuntimeError. Call this at the end of the settings module, before a
+    prefork server forks its workers. Under the Django autoreloader the
+    application settings modules stay imported, so changes to them are seen.
+    """
+    final = _IMPORTER.finalize()
+    _REPORT.flush()
+    return final
 
-def add_urlpatterns(patterns):
-    "Add urlpatterns to given patterns"
+def _preload_modules():
+    """Import the urls and views modules of the integrated applications.
+    Returns the names of the modules, an application without views is skipped.
+    """
+    modules = list()
     for module_path in _PATTERNS:
-        module = importlib.import_module(module_path)
+        views = module_path.split('.', 1)[0] + '.views'
+        for name in [module_path, views]:
+            if name in modules:
+                continue
+            try:
+                importlib.import_module(name)
+            except ModuleNotFoundError as error:
+                if error.name != name:
+                    raise
+                continue
+            modules.append(name)
+    return modules
+
+def preload():
+    """Do the work of every worker of a prefork server once, in the master.
+    Builds the url resolver, which imports all urls modules including the
+    lazily included ones, imports the views
+    modules of the applications and freezes the garbage collector heap, so
+    the forked workers share these pages and their first request does not
+    import anything. Call this after Django is set up, at the end of the wsgi
+    module, and let the server load the application before it forks, for
+    example with gunicorn --preload. The integration is not finalized here,
+    Django has read the settings by then, call finalize at the end of the
+    settings module for that.
+    Nothing is done with DEBUG on or under the Django autoreloader, like
+    runserver, which has to see changes to the application modules.
+    Returns the names of the imported application modules.
+    """
+    import gc
+    from django.conf import settings
+    from django.urls import get_resolver
+    if os.environ.get(_AUTORELOAD) or settings.DEBUG:
+        return list()
 
-        for entry in module.urlpatterns:
-            patterns.append(entry)
+    # Building the reverse lookup populates the complete resolver tree.
+    resolver = get_resolver()
+    getattr(resolver, 'reverse_dict')
+    modules = _preload_modules()
+
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    return modules
+
+def start_report():
+    "Start recording the integration steps, see get_report."
+    _REPORT.active = True
+
+def get_report():
+    """Return the recorded integration steps.
+    Each step is a dictionary with the call, the path it was given, the
+    seconds spent per phase (import, merge or cache), the number of keys
+    merged, the growth of the mergable settings and, when tracemalloc is
+    tracing, the memory growth in bytes.
+    """
+    return [entry.copy() for entry in _REPORT.entries]
 
@@ -0,0 +1,116 @@
+"""
+Startup report.
+
+Records how long the integration steps take and how much they add to the
+mergable settings. Recording is off unless it is started through
+django_integrator.start_report or the environment variable
+DJANGO_INTEGRATOR_REPORT is set. When the variable is set to a file path, the
+report is written there as JSON once the application urls are added, when the
+integration is finalized and at exit, whichever has new steps to write.
+"""
+import os
+import time
+
+ENVIRONMENT = 'DJANGO_INTEGRATOR_REPORT'
+
+def _memory():
+    "Return the traced memory in bytes, or None if tracemalloc is not tracing."
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        return None
+    return tracemalloc.get_traced_memory()[0]
+
+def _sizes(target, keys):
+    "Return the length of each of the keys in target."
+    sizes = dict()
+    for key in keys:
+        if key in target and hasattr(target[key], '__len__'):
+            sizes[key] = len(target[key])
+    return sizes
+
+
+class _Nothing(object):
+    "Stand in for Entry when the report is not recording."
+    def lap(self, name):
+        "Do nothing."
+
+    def finish(self, **extra):
+        "Do nothing."
+
+_NOTHING = _Nothing()
+
+
+class Entry(object):
+    "Timings and sizes of one integration step."
+    def __init__(self, report, call, path, target, keys):
+        self.report = report
+        self.target = target
+        self.keys = keys
+        self.data = {'call':call, 'path':path}
+        self.sizes = _sizes(target, keys)
+        self.memory = _memory()
+        self.clock = time.perf_counter()
+
+    def lap(self, name):
+        "Record the seconds since the previous lap under name."
+        now = time.perf_counter()
+        self.data[name] = now - self.clock
+        self.clock = now
+
+    def finish(self, **extra):
+        "Record the growth of the settings and add the entry to the report."
+        self.data.update(extra)
+        growth = dict()
+        sizes = _sizes(self.target, self.keys)
+        for key in sizes:
+            growth[key] = sizes[key] - self.sizes.get(key, 0)
+        self.data['growth'] = growth
+
+        memory = _memory()
+        if memory is not None and self.memory is not None:
+            self.data['memory'] = memory - self.memory
+
+        self.report.add(self.data)
+
+
+class Report(object):
+    "Collection of the recorded integration steps."
+    def __init__(self):
+        self.entries = list()
+        self.active = False
+        self.written = 0
+        self.registered = False
+
+    def enabled(self):
+        "Return True if steps are recorded."
+        return self.active or ENVIRONMENT in os.environ
+
+    def start(self, call, path, target=None, keys=()):
+        "Return an entry for the step, or a stand in if not recording."
+        if not self.enabled():
+            return _NOTHING
+        if target is None:
+            target = dict()
+        return Entry(self, call, path, target, keys)
+
+    def add(self, data):
+        "Add the data of a finished step, see flush for writing the report."
+        self.entries.append(data)
+        if not self.registered and os.environ.get(ENVIRONMENT, ''):
+            # Steps recorded after the last flush are written at exit.
+            import atexit
+            atexit.register(self.flush)
+            self.registered = True
+
+    def flush(self):
+        "Write the report if configured and steps were added since last time."
+        path = os.environ.get(ENVIRONMENT, '')
+        if path and self.written < len(self.entries):
+            self.dump(path)
+            self.written = len(self.entries)
+
+    def dump(self, path):
+        "Write the report as JSON to path."
+        import json
+        with open(path, 'w') as file_write:
+            json.dump(self.entries, file_write, indent=1, default=str)
@@ -0,0 +1,87 @@
+"""
+Creates a batch of django_integrator compliant projects from a manifest.
+
+The manifest is a JSON file with a list of objects, or a CSV file with a
+header row, both with the fields name, class, verbose, author and email, which
+are the arguments of django-integrator-create. All projects are created in
+one process, or spread over worker processes, so the interpreter and Django
+are only started once per worker.
+"""
+import concurrent.futures
+import csv
+import json
+import os
+import time
+import traceback
+from . import create
+
+FIELDS = ['name', 'class', 'verbose', 'author', 'email']
+
+def read_manifest(path):
+    """Return the list of project configurations in the manifest at path.
+    Raises ValueError if a row misses a field.
+    """
+    with open(path, 'r', newline='') as file_read:
+        if path.lower().endswith('.json'):
+            rows = json.load(file_read)
+        else:
+            rows = list(csv.DictReader(file_read))
+
+    configurations = list()
+    for number, row in enumerate(rows, 1):
+        missing = [field for field in FIELDS if not row.get(field)]
+        if len(missing) > 0:
+            text = 'Manifest row %d misses: %s' % (number, ', '.join(missing))
+            raise ValueError(text)
+        configurations.append(dict((field, row[field]) for field in FIELDS))
+    return configurations
+
+def _create(configuration, cwd):
+    "Create one project, return the result instead of raising."
+    result = {'name':configuration['name'], 'error':None, 'steps':None}
+    start = time.perf_counter()
+    try:
+        result['steps'] = create.main(dict(configuration), cwd)
+    except Exception as exception: # pylint: disable=broad-except
+        result['error'] = '%s: %s' % (type(exception).__name__, exception)
+        result['traceback'] = traceback.format_exc()
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def create_all(configurations, cwd=create.CWD, workers=1):
+    """Create the projects of all configurations in cwd.
+    With more than one worker the projects are created in that many worker
+    processes. A failing project does not stop the others.
+    Returns a result per configuration, in the same order.
+    """
+    names = [configuration['name'] for configuration in configurations]
+    if len(set(names)) != len(names):
+        raise ValueError('Manifest has duplicate project names.')
+
+    if workers <= 1 or len(configurations) <= 1:
+        return [_create(configuration, cwd)
+                for configuration in configurations]
+
+    workers = min(workers, len(configurations))
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(_create, configurations,
+                                 [cwd] * len(configurations)))
+
+def summary(results):
+    "Return a text report of the results."
+    lines = list()
+    for result in results:
+        status = 'ok' if result['error'] is None else result['error']
+        lines.append('%-40s %8.2fs  %s' % (result['name'], result['seconds'],
+                                           status))
+    failed = len([result for result in results if result['error']])
+    lines.append('%d created, %d failed.' % (len(results) - failed, failed))
+    return '\n'.join(lines)
+
+def main(path, workers=1, cwd=create.CWD):
+    """Create all projects in the manifest at path and print the summary.
+    Returns 1 if any project failed, else 0.
+    """
+    results = create_all(read_manifest(path), os.path.abspath(cwd), workers)
+    print(summary(results))
+    return 1 if any(result['error'] for result in results) else 0
@@ -0,0 +1,56 @@
+"""
+In memory template bundle.
+
+The templates are read once per process and kept in memory, so creating many
+projects, for example from a manifest, does not read them again for every
+project. The rendered files are collected in an Output and written together.
+"""
+import os
+
+_BUNDLES = dict()
+
+class Bundle(object):
+    "The contents of all template files in a directory."
+    def __init__(self, directory):
+        self.directory = directory
+        self.texts = dict()
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                with open(path, 'r') as file_read:
+                    self.texts[name] = file_read.read()
+
+    def text(self, template):
+        "Return the template as is."
+        return self.texts[template]
+
+    def render(self, template, **values):
+        "Return the template formatted with values."
+        return self.texts[template].format(**values)
+
+
+class Output(object):
+    "Rendered files that are written together."
+    def __init__(self):
+        self.files = list()
+
+    def add(self, path, text, mode=None):
+        "Add the file path with text, and optionally its permission mode."
+        self.files.append((path, text, mode))
+
+    def write(self):
+        "Write all added files."
+        for path, text, mode in self.files:
+            with open(path, 'w') as file_write:
+                file_write.write(text)
+            if mode is not None:
+                os.chmod(path, mode)
+        self.files = list()
+
+
+def load(directory):
+    "Return the bundle of the templates in directory, read on first use."
+    directory = os.path.abspath(directory)
+    if directory not in _BUNDLES:
+        _BUNDLES[directory] = Bundle(directory)
+    return _BUNDLES[directory]
@@ -1,34 +1,19 @@
 """
 Creates a django_integrator compliant project.
 """
+import concurrent.futures
 import os
 import stat
 import shutil
-import sys
 import datetime
-import http.client
+import time
+from . import bundle, pypi
 
-PYPI = 'pypi.python.org'
-PATH = '/pypi/%s/json'
 CWD = os.path.abspath(os.getcwd())
 
-def _get_pypi_response(path):
-    "Simple https get function."
-    connection = http.client.HTTPSConnection(PYPI)
-    connection.request('GET', path)
-    response = connection.getresponse()
-    connection.close()
-    return response
-
 def _check_pypi(configuration):
     "Query pip if the package name already exists"
-    path = PATH % configuration['name']
-    response = _get_pypi_response(path)
-    while response.status == 301:
-        header = dict(response.getheaders())
-        response = _get_pypi_response(header['Location'])
-
-    if response.status == 200:
+    if pypi.exists(configuration['name']):
         text = 'PyPi has already a package named: %s' % configuration['name']
         raise ValueError(text)
 
@@ -45,10 +30,13 @@ def _create_project(configuration):
 
 def _create_application(configuration):
     "create the application in the project."
-    cmd = [sys.executable, os.path.join(configuration['dir'], 'manage.py'),
-           'startapp', configuration['django_app_name']]
-    popen = os.popen(' '.join(cmd))
-    popen.close()
+    from django.core.management.commands import startapp
+    command = startapp.Command()
+    options = {'pythonpath': None, 'files': [], 'directory': None,
+               'verbosity': 1, 'extensions': ['py'], 'no_color': False,
+               'traceback': False, 'settings': None, 'template': None}
+    options['name'] = configuration['django_app_name']
+    command.handle(**options)
 
 
 def _create_folders(configuration):
@@ -68,12 +56,12 @@ def _copy_files(configuration):
                ['urls_py.txt', 'urls.py',],
                ['views_py.txt', 'views.py']]
 
+    # These are written directly, as the following steps move some of them.
+    templates = bundle.load(configuration['templates'])
     for source, target in to_copy:
-        source = source = os.path.join(configuration['templates'], source)
         target = os.path.join(configuration['django_app_name'], target)
-        if os.path.exists(target):
-            os.remove(target)
-        shutil.copy(source, target)
+        with open(target, 'w') as file_write:
+            file_write.write(templates.text(source))
 
 def _move_test(configuration):
     "Move the test file to the test module and rename it."
@@ -117,10 +105,10 @@ def _make_contents_tools(configuration):
     to_copy = [['models_py.txt', 'models.py'],
                ['sanitize_py.txt', 'sanitize.py']]
 
+    templates = bundle.load(configuration['templates'])
     for row in to_copy:
-        source = os.path.join(configuration['templates'], row[0])
         target = os.path.join(configuration['django_app_name'], 'tools', row[1])
-        shutil.copy(source, target)
+        configuration['output'].add(target, templates.text(row[0]))
 
 
 def _create_requirements(configuration):
@@ -146,10 +134,9 @@ def _copy_into_project(configuration):
     to_copy = [['README.txt', 'README.txt'],
                ['setup_cfg.txt', 'setup.cfg']]
 
+    templates = bundle.load(configuration['templates'])
     for source, target in to_copy:
-        source = source = os.path.join(configuration['templates'], source)
-        target = os.path.join(target)
-        shutil.copy(source, target)
+        configuration['output'].add(target, templates.text(source))
 
 def _append_integrator_imports(configuration):
     "Append to interface settings"
@@ -168,6 +155,13 @@ def _append_integrator_imports(configuration):
         file_append.write('import django_integrator\n')
         file_append.write('django_integrator.add_urlpatterns(urlpatterns)')
 
+    # Preload in the wsgi module, which a prefork server loads before forking
+    with open(os.path.join('interface', 'wsgi.py'), 'a') as file_append:
+        file_append.write('\n# Preload the applications before forking\n')
+        file_append.write('# pylint:disable=wrong-import-position\n')
+        file_append.write('import django_integrator\n')
+        file_append.write('django_integrator.preload()\n')
+
 def _remove_files(configuration):
     "Remove files we don't need"
     filenames = ['apps.py']
@@ -177,75 +171,154 @@ def _remove_files(configuration):
 
 def _write_devset(configuration):
     "write the developer reset."
-    read_name = 'devset_py.txt'
-    write_name = 'devset.py'
-    with open(os.path.join(configuration['templates'],
-                           read_name), 'r') as file_read:
-        text = ''.join(file_read.readlines())
-        text = text.format(name=configuration['django_app_name'])
-        with open(write_name, 'w') as file_write:
-            file_write.write(text)
-
-    os.chmod(write_name, stat.S_IEXEC|stat.S_IREAD)
+    templates = bundle.load(configuration['templates'])
+    text = templates.render('devset_py.txt',
+                            name=configuration['django_app_name'])
+    configuration['output'].add('devset.py', text, stat.S_IEXEC|stat.S_IREAD)
 
 def _write_license(configuration):
     "Write the license file"
-    read_name = 'license_template.txt'
-    write_name = 'LICENSE.txt'
     year = datetime.datetime.now().strftime('%Y')
-    with open(os.path.join(configuration['templates'],
-                           read_name), 'r') as file_read:
-        text = ''.join(file_read.readlines())
-        text = text.format(author=configuration['author'],
-                           email=configuration['email'], year=year)
-        with open(write_name, 'w') as file_write:
-            file_write.write(text)
+    templates = bundle.load(configuration['templates'])
+    text = templates.render('license_template.txt',
+                            author=configuration['author'],
+                            email=configuration['email'], year=year)
+    configuration['output'].add('LICENSE.txt', text)
 
 def _write_info(configuration):
     "Write the info file."
-    read_name = 'info_py.txt'
     write_name = os.path.join(configuration['django_app_name'], '__info__.py')
-    with open(os.path.join(configuration['templates'],
-                           read_name), 'r') as file_read:
-        text = ''.join(file_read.readlines())
-        kwargs = {'class':configuration['class'],
-                  'name':configuration['django_app_name'],
-                  'verbose':configuration['verbose']}
-        text = text.format(**kwargs)
-        with open(write_name, 'w') as file_write:
-            file_write.write(text)
+    templates = bundle.load(configuration['templates'])
+    kwargs = {'class':configuration['class'],
+              'name':configuration['django_app_name'],
+              'verbose':configuration['verbose']}
+    configuration['output'].add(write_name,
+                                templates.render('info_py.txt', **kwargs))
 
 def _write_setup(configuration):
     "Write the setup file."
-    read_name = 'setup_py.txt'
-    write_name = 'setup.py'
-    with open(os.path.join(configuration['templates'],
-                           read_name), 'r') as file_read:
-        text = ''.join(file_read.readlines())
-        text = text.format(**configuration)
-        with open(write_name, 'w') as file_write:
-            file_write.write(text)
+    templates = bundle.load(configuration['templates'])
+    configuration['output'].add('setup.py',
+                                templates.render('setup_py.txt',
+                                                 **configuration))
+
+def _write_output(configuration):
+    "Write all rendered files."
+    configuration['output'].write()
 
 PROCESS = [
     _check_pypi, _create_project, _create_application, _create_folders,
     _copy_files, _move_test, _move_inits, _make_inits_commands,
     _make_contents_tools, _create_requirements, _copy_into_project,
     _append_integrator_imports, _remove_files, _write_devset, _write_license,
-    _write_info, _write_setup]
+    _write_info, _write_setup, _write_output]
+
+# The steps each step needs to be finished before it can run, by name. A step
+# that is not listed here waits for all steps before it in PROCESS.
+DEPENDS = {
+    '_check_pypi':[],
+    '_create_project':[],
+    '_create_application':['_create_project'],
+    '_create_folders':['_create_application'],
+    '_copy_files':['_create_application'],
+    '_move_test':['_create_folders'],
+    '_move_inits':['_create_folders', '_copy_files', '_move_test'],
+    '_make_inits_commands':['_create_folders'],
+    '_make_contents_tools':['_create_folders'],
+    '_create_requirements':['_create_project', '_create_application'],
+    '_copy_into_project':[],
+    '_append_integrator_imports':['_create_project'],
+    '_remove_files':['_create_application'],
+    '_write_devset':[],
+    '_write_license':[],
+    '_write_info':[],
+    '_write_setup':[],
+    '_write_output':['_create_application', '_create_folders',
+                     '_move_inits', '_make_contents_tools',
+                     '_copy_into_project', '_write_devset', '_write_license',
+                     '_write_info', '_write_setup'],
+    }
+
+def _dependencies(process):
+    "Return the set of step indexes each step of process depends on."
+    names = [function.__name__ for function in process]
+    dependencies = list()
+    for index, name in enumerate(names):
+        if name in DEPENDS:
+            dependencies.append(set(names.index(_) for _ in DEPENDS[name]
+                                    if _ in names))
+        else:
+            dependencies.append(set(range(index)))
+    return dependencies
+
+def _timed(function, configuration):
+    "Run the step function, return the seconds it took."
+    start = time.perf_counter()
+    function(configuration)
+    return time.perf_counter() - start
+
+def run(process, configuration, workers=None):
+    """Run the steps of process on a thread pool, each step as soon as the
+    steps it depends on are finished.
+    Returns the seconds each step took by step name. If a step fails, no new
+    steps are started and its exception is raised once the running ones are
+    finished.
+    """
+    dependencies = _dependencies(process)
+    timings = dict()
+    done = set()
+    started = set()
+    running = dict()
+    error = None
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        while True:
+            for index, function in enumerate(process):
+                if error is None and index not in started and \
+                   dependencies[index] <= done:
+                    started.add(index)
+                    future = executor.submit(_timed, function, configuration)
+                    running[future] = index
+
+            if len(running) == 0:
+                break
+
+            finished = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)[0]
+            for future in finished:
+                index = running.pop(future)
+                try:
+                    timings[process[index].__name__] = future.result()
+                except Exception as exception: # pylint: disable=broad-except
+                    if error is None:
+                        error = exception
+                done.add(index)
+
+    if error is not None:
+        raise error
+    if len(done) < len(process):
+        raise ValueError('The steps of the process depend on each other.')
+    return timings
 
 def main(configuration, cwd=CWD):
-    "main functionality"
+    """main functionality
+    Returns the seconds each step took, if a step fails the project directory
+    is removed again.
+    """
     configuration['dir'] =  os.path.join(cwd,
                                          configuration['name'].strip().lower())
     os.mkdir(configuration['dir'])
     _ = os.path.dirname(os.path.abspath(__file__))
     configuration['templates'] = os.path.join(_, 'templates')
+    configuration['output'] = bundle.Output()
 
     _ = configuration['name'].lower().replace('-','_')
     configuration['django_app_name'] = _
     os.chdir(configuration['dir'])
-
-    for function in PROCESS:
-        function(configuration)
-
-    os.chdir(cwd)
+    try:
+        timings = run(PROCESS, configuration)
+    except Exception:
+        shutil.rmtree(configuration['dir'], ignore_errors=True)
+        raise
+    finally:
+        os.chdir(cwd)
+    return timings
@@ -0,0 +1,170 @@
+#! /usr/bin/env python
+"""
+Freezes the settings and urls of a Django-Integrator project.
+The project settings module is imported once, including all the applications
+it integrates, and the merged result is written next to it as a flat settings
+module and a flat urls module. Point DJANGO_SETTINGS_MODULE to the frozen
+settings module to start without merging any application settings.
+"""
+import argparse
+import importlib
+import os
+import pathlib
+import pprint
+import sys
+
+HEADER = '''"""
+Frozen settings of {source}, generated by django-integrator-freeze.
+Do not edit, freeze the project again instead.
+"""
+# pylint: disable=line-too-long
+'''
+
+HEADER_URLS = '''"""
+Frozen urls of {source}, generated by django-integrator-freeze.
+Do not edit, freeze the project again instead.
+"""
+# pylint: disable=invalid-name, line-too-long
+'''
+
+# Values are written with their repr, these names make the repr of paths
+# importable again.
+_NAMESPACE = {'PosixPath':pathlib.PosixPath,
+              'WindowsPath':pathlib.WindowsPath,
+              'PurePosixPath':pathlib.PurePosixPath,
+              'PureWindowsPath':pathlib.PureWindowsPath}
+
+# Keys that only have a meaning for the integrator itself.
+_SKIP = ['URLCONF', 'URLPREFIX']
+
+def _representation(value):
+    "Return the source representation of value, or None if it has none."
+    text = pprint.pformat(value, sort_dicts=False)
+    try:
+        # pylint: disable=eval-used
+        restored = eval(text, {'__builtins__':{}}, dict(_NAMESPACE))
+    except Exception: # pylint: disable=broad-except
+        return None
+
+    if restored != value:
+        return None
+    return text
+
+def render_settings(source, values, root_urlconf):
+    "Return the text of the frozen settings module."
+    lines = list()
+    failed = list()
+    for key in values:
+        if key in _SKIP:
+            continue
+
+        value = root_urlconf if key == 'ROOT_URLCONF' else values[key]
+        text = _representation(value)
+        if text is None:
+            failed.append(key)
+        else:
+            lines.append('%s = %s\n' % (key, text))
+
+    if len(failed) > 0:
+        text = 'Settings can not be written as source: %s' % ', '.join(failed)
+        raise ValueError(text)
+
+    body = ''.join(lines)
+    names = [name for name in sorted(_NAMESPACE) if name + '(' in body]
+    header = HEADER.format(source=source)
+    if len(names) > 0:
+        header += 'from pathlib import %s\n' % ', '.join(names)
+    return header + '\n' + body
+
+def render_urls(source, module_paths, prefixes=None):
+    """Return the text of the frozen urls module.
+    With prefixes, the URLPREFIX settings by application, the applications
+    are mounted like add_urlpatterns does with indexed set.
+    """
+    lines = [HEADER_URLS.format(source=source)]
+    lines.append('from %s import urlpatterns as _root\n' % source)
+    for index, module_path in enumerate(module_paths):
+        lines.append('from %s import urlpatterns as _%s\n' % (module_path,
+                                                               index))
+
+    body = ['\nurlpatterns = list(_root)\n']
+    mounts = list()
+    position = None
+    for index, module_path in enumerate(module_paths):
+        if prefixes is not None:
+            application = module_path.split('.', 1)[0]
+            prefix = prefixes.get(application, application)
+            if prefix.strip('/'):
+                if position is None:
+                    position = len(body)
+                    body.append(None)
+                mounts.append('(%r, _%s)' % (prefix, index))
+                continue
+        body.append('urlpatterns.extend(_%s)\n' % index)
+
+    if len(mounts) > 0:
+        lines.append('from django_integrator import dispatch\n')
+        body[position] = 'urlpatterns.append(dispatch.build([%s]))\n' % \
+                         ', '.join(mounts)
+    return ''.join(lines + body)
+
+def freeze(settings_path, settings_name='settings_frozen',
+           urls_name='urls_frozen', indexed=False):
+    """Freeze the settings module settings_path.
+    Set indexed if the urls module adds the application urls with indexed set.
+    Returns the paths of the written settings and urls files.
+    """
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_path
+    settings = importlib.import_module(settings_path)
+    from django_integrator import main as integrator
+
+    values = dict()
+    for key in settings.__dict__:
+        if key.isupper():
+            values[key] = settings.__dict__[key]
+
+    package = settings_path.rpartition('.')[0]
+    prefix = package + '.' if package else ''
+    directory = os.path.dirname(os.path.abspath(settings.__file__))
+
+    # pylint: disable=protected-access
+    texts = [(settings_name,
+              render_settings(settings_path, values, prefix + urls_name)),
+             (urls_name,
+              render_urls(values['ROOT_URLCONF'], integrator._PATTERNS,
+                          integrator._PREFIXES if indexed else None))]
+    paths = list()
+    for name, text in texts:
+        path = os.path.join(directory, name + '.py')
+        with open(path, 'w') as file_write:
+            file_write.write(text)
+        paths.append(path)
+
+    return paths
+
+def main():
+    """
+    main function
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('settings', nargs='?',
+        default=os.environ.get('DJANGO_SETTINGS_MODULE', 'interface.settings'),
+        help='The dotted path of the project settings module.')
+
+    parser.add_argument('--settings-name', default='settings_frozen',
+        help='The module name of the frozen settings.')
+
+    parser.add_argument('--urls-name', default='urls_frozen',
+        help='The module name of the frozen urls.')
+
+    parser.add_argument('--indexed', action='store_true',
+        help='Mount the application urls under their prefix, as '
+             'add_urlpatterns(urlpatterns, indexed=True) does.')
+
+    args = parser.parse_args()
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    for path in freeze(args.settings, args.settings_name, args.urls_name,
+                       args.indexed):
+        print(path)
@@ -5,6 +5,7 @@ and minnimal PyPI setup skeletons.
 The django project app itself is named 'interface', as it holds the website
 gateway interface file.
 Please note that the default license is set to BSD.
+Use --manifest to create a batch of projects at once instead.
 """
 import argparse
 from . import create
@@ -14,27 +15,49 @@ def main():
     main function
     """
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument('pypi_name',
+    parser.add_argument('pypi_name', nargs='?',
         help='The name as it would be used in the PyPI repository.')
 
-    parser.add_argument('django_app_class_name',
+    parser.add_argument('django_app_class_name', nargs='?',
         help='The name class name as registered by Django.')
 
-    parser.add_argument('verbose_name',
+    parser.add_argument('verbose_name', nargs='?',
         help='The verbose name used in the Django admin and PyPI repository.')
 
-    parser.add_argument('author',
+    parser.add_argument('author', nargs='?',
         help='Your or your companies name.')
 
-    parser.add_argument('email',
+    parser.add_argument('email', nargs='?',
         help='Your or your companies email address.')
 
+    parser.add_argument('--manifest',
+        help='A JSON or CSV file with the name, class, verbose, author and '
+             'email of each project to create.')
+
+    parser.add_argument('--workers', type=int, default=1,
+        help='Number of processes creating the manifest projects.')
+
+    parser.add_argument('--timings', action='store_true',
+        help='Print how long each creation step took.')
+
     args = parser.parse_args()
+    if args.manifest is not None:
+        from . import bulk
+        return bulk.main(args.manifest, args.workers)
+
+    if None in [args.pypi_name, args.django_app_class_name, args.verbose_name,
+                args.author, args.email]:
+        parser.error('all positional arguments are required without '
+                     '--manifest')
+
     tmp = {'name':args.pypi_name,
            'class':args.django_app_class_name,
            'verbose':args.verbose_name,
            'author':args.author,
            'email':args.email}
 
-    create.main(tmp)
+    timings = create.main(tmp)
+    if args.timings:
+        for name in sorted(timings, key=timings.get, reverse=True):
+            print('%-28s %8.3fs' % (name, timings[name]))
 
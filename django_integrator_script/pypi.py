@@ -0,0 +1,205 @@
+"""
+PyPI name availability.
+
+A name is looked up in the JSON API of PyPI over a connection that is kept
+open for the following lookups, the answers are cached on disk for a day.
+When the environment variable DJANGO_INTEGRATOR_PYPI_INDEX points to a
+snapshot of the simple index, for example the page at
+https://pypi.org/simple/ or a text file with one name per line, names are
+only looked up in that snapshot and no network is used at all.
+The cache directory is set with DJANGO_INTEGRATOR_PYPI_CACHE, by default it
+is the django-integrator directory in the user cache directory.
+"""
+import http.client
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.parse
+
+HOST = 'pypi.org'
+PATH = '/pypi/%s/json'
+TIMEOUT = 10
+EXPIRY = 24 * 60 * 60
+ENVIRONMENT_CACHE = 'DJANGO_INTEGRATOR_PYPI_CACHE'
+ENVIRONMENT_INDEX = 'DJANGO_INTEGRATOR_PYPI_INDEX'
+_REDIRECTS = [301, 302, 303, 307, 308]
+_DEFAULT = dict()
+
+def normalize(name):
+    "Return the name as PyPI compares it."
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+class Client(object):
+    "Kept open connections to PyPI, one per host."
+    def __init__(self, host=HOST, scheme='https', timeout=TIMEOUT):
+        self.host = host
+        self.scheme = scheme
+        self.timeout = timeout
+        self.connections = dict()
+        self.lock = threading.Lock()
+
+    def _connection(self, scheme, host):
+        "Return the connection to host, it is opened on first use."
+        if (scheme, host) not in self.connections:
+            if scheme == 'https':
+                connection = http.client.HTTPSConnection
+            else:
+                connection = http.client.HTTPConnection
+            self.connections[(scheme, host)] = connection(
+                host, timeout=self.timeout)
+        return self.connections[(scheme, host)]
+
+    @staticmethod
+    def _request(connection, path):
+        "Return the status and location header of a GET of path."
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            # The body has to be read before the connection can be reused.
+            response.read()
+        except (http.client.HTTPException, OSError):
+            # Closing resets the connection, the next request reconnects.
+            connection.close()
+            raise
+        return response.status, response.getheader('Location')
+
+    def _get(self, scheme, host, path):
+        "Return the status and location header of a GET of path on host."
+        connection = self._connection(scheme, host)
+        try:
+            return self._request(connection, path)
+        except ConnectionError:
+            # The server may have closed the kept open connection, try once
+            # more on a new one.
+            return self._request(connection, path)
+
+    def status(self, path, redirects=5):
+        "Return the status of a GET of path, following redirects."
+        scheme = self.scheme
+        host = self.host
+        with self.lock:
+            for _ in range(redirects + 1):
+                status, location = self._get(scheme, host, path)
+                if status not in _REDIRECTS or not location:
+                    return status
+
+                parts = urllib.parse.urlsplit(location)
+                scheme = parts.scheme or scheme
+                host = parts.netloc or host
+                path = parts.path
+                if parts.query:
+                    path += '?' + parts.query
+
+        text = 'More than %d redirects for %s' % (redirects, path)
+        raise http.client.HTTPException(text)
+
+    def close(self):
+        "Close all connections."
+        with self.lock:
+            for connection in self.connections.values():
+                connection.close()
+            self.connections = dict()
+
+
+def read_index(path):
+    """Return the set of normalized names in the index snapshot at path.
+    The snapshot is the HTML of a simple index, or text with a name per line.
+    """
+    with open(path, 'r', encoding='utf-8') as file_read:
+        text = file_read.read()
+
+    names = re.findall(r'<a[^>]*>([^<]+)</a>', text)
+    if len(names) == 0:
+        names = text.split()
+    return frozenset(normalize(name.strip()) for name in names)
+
+
+class Checker(object):
+    """Tells if a name is taken on PyPI.
+    With an index only the index is used, else a cached answer that has not
+    expired, else the answer of PyPI, which is then cached.
+    """
+    def __init__(self, client=None, cache=None, expiry=EXPIRY, index=None):
+        if client is None:
+            client = Client()
+        self.client = client
+        self.path = None
+        if cache is not None:
+            self.path = os.path.join(cache, 'pypi.json')
+        self.expiry = expiry
+        self.index = index
+        self.entries = self._load()
+
+    def _load(self):
+        "Return the cached answers by normalized name."
+        if self.path is None:
+            return dict()
+        try:
+            with open(self.path, 'r') as file_read:
+                entries = json.load(file_read)
+        except (OSError, ValueError):
+            return dict()
+        return entries if isinstance(entries, dict) else dict()
+
+    def _store(self):
+        "Write the cached answers, a cache that can not be written is skipped."
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            handle, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(handle, 'w') as file_write:
+                json.dump(self.entries, file_write)
+            os.replace(path, self.path)
+        except OSError:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def exists(self, name):
+        "Return True if PyPI has a package with name."
+        key = normalize(name)
+        if self.index is not None:
+            return key in self.index
+
+        entry = self.entries.get(key)
+        if entry is not None and time.time() - entry[1] < self.expiry:
+            return entry[0]
+
+        status = self.client.status(PATH % urllib.parse.quote(name))
+        exists = status == 200
+        # Only definite answers are cached, not for example server errors.
+        if status in [200, 404]:
+            self.entries[key] = [exists, time.time()]
+            self._store()
+        return exists
+
+
+def _cache_directory():
+    "Return the configured cache directory."
+    if ENVIRONMENT_CACHE in os.environ:
+        return os.environ[ENVIRONMENT_CACHE]
+    base = os.environ.get('XDG_CACHE_HOME',
+                          os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'django-integrator')
+
+def default():
+    "Return the checker configured by the environment, created on first use."
+    if 'checker' not in _DEFAULT:
+        index = None
+        if os.environ.get(ENVIRONMENT_INDEX):
+            index = read_index(os.environ[ENVIRONMENT_INDEX])
+        _DEFAULT['checker'] = Checker(cache=_cache_directory(), index=index)
+    return _DEFAULT['checker']
+
+def exists(name):
+    "Return True if PyPI has a package with name, see default."
+    return default().exists(name)
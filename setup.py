@@ -18,8 +18,12 @@ URL_DOWNLOAD = URL_MAIN + 'get/' + DOWNLOAD_ID + '.zip'
 #
 PACKAGES = ['django_integrator', 'django_integrator_script']
 PACKAGE_DATA  = {'django_integrator_script': ['templates/*.txt']}
-SCRIPT = 'django-integrator-create='\
-         'django_integrator_script.make_application:main'
+SCRIPTS = [
+    'django-integrator-create='
+    'django_integrator_script.make_application:main',
+    'django-integrator-freeze='
+    'django_integrator_script.freeze:main',
+    ]
 KEYWORDS = [
     'django',
     ]
@@ -40,6 +44,6 @@ KWARGS = {
     'url':URL_MAIN, 'download_url':URL_DOWNLOAD, 'keywords':KEYWORDS,
     'license':LICENSE, 'classifiers':CLASSIFIERS,
     'install_requires':REQUIREMENTS, 'package_data':PACKAGE_DATA,
-    'entry_points':{'console_scripts':[SCRIPT]},}
+    'entry_points':{'console_scripts':SCRIPTS},}
 
 setup(**KWARGS)
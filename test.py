@@ -8,7 +8,65 @@ import sys
 import os
 import tempfile
 import shutil
-from django_integrator_script import create, make_application
+from django_integrator_script import create, make_application, pypi
+
+# Names the stand in PyPI server reports as taken.
+_TAKEN = ['django-integrator']
+# The session state: the stand in server, its thread and the scaffolded
+# reference projects by name.
+_SESSION = {'projects':dict()}
+
+def setUpModule():
+    """Start a local stand in for PyPI and let the name checks use it, so
+    the suite runs offline."""
+    import http.server
+    import threading
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self): # pylint: disable=invalid-name
+            names = [pypi.PATH % name for name in _TAKEN]
+            self.send_response(200 if self.path in names else 404)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args): # pylint: disable=arguments-differ
+            pass
+
+    server = http.server.HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    host = '127.0.0.1:%d' % server.server_address[1]
+    pypi._DEFAULT['checker'] = pypi.Checker(pypi.Client(host, 'http', 5))
+    _SESSION.update(server=server, thread=thread, tmp=tempfile.mkdtemp())
+
+def tearDownModule():
+    pypi._DEFAULT.pop('checker', None)
+    _SESSION['server'].shutdown()
+    _SESSION['server'].server_close()
+    _SESSION['thread'].join()
+    shutil.rmtree(_SESSION['tmp'])
+    _SESSION['projects'].clear()
+
+def _clone(cfg, cwd):
+    """Copy the project of cfg into cwd, as create.main(cfg, cwd) would make
+    it. The project is only scaffolded once per session, later calls copy
+    that reference project."""
+    projects = _SESSION['projects']
+    if cfg['name'] not in projects:
+        reference = dict((key, cfg[key]) for key in
+                         ['name', 'class', 'verbose', 'author', 'email'])
+        directory = tempfile.mkdtemp(dir=_SESSION['tmp'])
+        create.main(reference, directory)
+        projects[cfg['name']] = reference
+
+    reference = projects[cfg['name']]
+    cfg.update(reference)
+    cfg['dir'] = os.path.join(cwd, os.path.basename(reference['dir']))
+    # A copy and not hard links, as the tests change files in place.
+    shutil.copytree(reference['dir'], cfg['dir'])
 
 class Test001Script(unittest.TestCase):
     def setUp(self):
@@ -23,7 +81,7 @@ class Test001Script(unittest.TestCase):
         shutil.rmtree(self.tempdir)
 
     def test_no_apps_py(self):
-        create.main(self.cfg, self.tempdir)
+        _clone(self.cfg, self.tempdir)
         path = os.path.join(self.tempdir, self.cfg['name'],
                             self.cfg['django_app_name'])
         self.assertNotIn('apps.py', os.listdir(path=path))
@@ -35,7 +93,7 @@ class Test001Script(unittest.TestCase):
 
     def test_content(self):
         tmp = list()
-        create.main(self.cfg, self.tempdir)
+        _clone(self.cfg, self.tempdir)
         for entry in os.walk(self.tempdir):
             for item in entry[2]:
                 path = os.path.join(entry[0], item)
@@ -60,6 +118,47 @@ class Test001Script(unittest.TestCase):
         sys.argv = argv_orig
         self.assertEqual(5, len(tmp[0]))
 
+class Test001ScriptProcess(unittest.TestCase):
+    def test_000_dependencies(self):
+        calls = list()
+        def first(configuration):
+            calls.append('first')
+        def second(configuration):
+            calls.append('second')
+        def _write_license(configuration):
+            calls.append('license')
+
+        self.assertEqual([set(), set([0]), set()],
+                         create._dependencies([first, second,
+                                               _write_license]))
+        timings = create.run([first, second, _write_license], dict())
+        self.assertEqual(set(['first', 'second', '_write_license']),
+                         set(timings))
+        self.assertLess(calls.index('first'), calls.index('second'))
+
+    def test_001_failure(self):
+        calls = list()
+        def first(configuration):
+            raise ValueError('taken')
+        def second(configuration):
+            calls.append('second')
+
+        self.assertRaises(ValueError, create.run, [first, second], dict())
+        self.assertEqual([], calls)
+
+    def test_002_cycle(self):
+        def _create_project(configuration):
+            pass
+        def _create_application(configuration):
+            pass
+        depends_original = create.DEPENDS['_create_project']
+        create.DEPENDS['_create_project'] = ['_create_application']
+        try:
+            self.assertRaises(ValueError, create.run,
+                              [_create_project, _create_application], dict())
+        finally:
+            create.DEPENDS['_create_project'] = depends_original
+
 def _strip_interface_settings(path):
     """
     Strip the last lines in the settings file that have the django
@@ -93,7 +192,7 @@ def _setup():
            'email':'first.last@example.com',
            'tmp':tempfile.mkdtemp()}
 
-    create.main(cfg, cfg['tmp'])
+    _clone(cfg, cfg['tmp'])
     path = os.path.join(cfg['tmp'], cfg['name'])
     sys.path.insert(0, path)
     cfg['settings_orig'] = os.environ.get('DJANGO_SETTINGS_MODULE', None)
@@ -157,6 +256,39 @@ class Test002Integrator(unittest.TestCase):
         django_integrator.main._merger_list(source, target)
         self.assertEqual(expect, target)
 
+    def test_002a_list_merge_tail(self):
+        "test list merge keeps appended items after the original items."
+        source = ['nil', 'zero', 'one', 'last']
+        target = ['first', 'one', 'two']
+        expect = ['first', 'zero', 'one', 'two', 'nil', 'last']
+
+        import django_integrator.main
+        django_integrator.main._merger_list(source, target)
+        self.assertEqual(expect, target)
+
+    def test_002b_list_merge_unhashable(self):
+        "test list merge for items that can not be hashed."
+        source = [{'nil':0}, {'one':1}, {'last':2}]
+        target = [{'first':0}, {'one':1}, {'two':2}]
+        expect = [{'first':0}, {'nil':0}, {'one':1}, {'two':2}, {'last':2}]
+
+        import django_integrator.main
+        django_integrator.main._merger_list(source, target)
+        self.assertEqual(expect, target)
+
+    def test_002c_list_merge_all(self):
+        "test merging several sources in one pass."
+        sources = [['nil', 'one'], ['zero', 'nil', 'last'], ['two', 'more']]
+        target = ['first', 'one', 'two']
+        expect = target[::]
+
+        import django_integrator.main
+        for source in sources:
+            django_integrator.main._merger_list(source, expect)
+
+        django_integrator.main.merger_all(sources, target)
+        self.assertEqual(expect, target)
+
     def test_003_dict_merge(self):
         "test list merge for inserting."
         source = {'one':1}
@@ -173,6 +305,998 @@ class Test002Integrator(unittest.TestCase):
         self.assertRaises(NotImplementedError, django_integrator.main.merger,
                           int(), list())
 
+    def test_005_lazy(self):
+        "test the importer is only created on first use."
+        import django_integrator.main
+        calls = list()
+        def factory():
+            calls.append(None)
+            return dict(one=1)
+
+        lazy = django_integrator.main._Lazy(factory)
+        self.assertEqual(0, len(calls))
+        self.assertEqual([1], list(lazy.values()))
+        self.assertEqual(['one'], list(lazy.keys()))
+        self.assertEqual(1, len(calls))
+
+    def test_006_strategies(self):
+        "test the deep merge of TEMPLATES and DATABASES."
+        import django_integrator.main
+        main = django_integrator.main
+        options = {'context_processors':['base']}
+        templates = [{'BACKEND':'django', 'OPTIONS':options}]
+        main.merger_by_backend([[{'BACKEND':'django', 'OPTIONS':
+                                  {'context_processors':['app']}}],
+                                [{'BACKEND':'jinja2'}]], templates)
+        self.assertEqual([{'BACKEND':'django', 'OPTIONS':
+                           {'context_processors':['base', 'app']}},
+                          {'BACKEND':'jinja2'}], templates)
+        self.assertEqual({'context_processors':['base']}, options)
+
+        databases = {'default':{'NAME':'db', 'OPTIONS':{'timeout':1}}}
+        main.merger_deep([{'default':{'OPTIONS':{'init':'x'}}},
+                          {'other':{}}], databases)
+        self.assertEqual({'default':{'NAME':'db', 'OPTIONS':{'timeout':1,
+                                                             'init':'x'}},
+                          'other':{}}, databases)
+
+        target = ['one', {'two':2}]
+        main.merger_unique([['three', 'one'], [{'two':2}, 'three']], target)
+        self.assertEqual(['one', {'two':2}, 'three'], target)
+
+    def test_007_snapshot_replaced(self):
+        "test the original of a list with replaced entries."
+        import django_integrator.main
+        main = django_integrator.main
+        original = {'BACKEND':'django'}
+        templates = [original]
+        snapshot = main._Snapshot(templates)
+        for source in [[{'BACKEND':'django', 'DIRS':['one']}],
+                       [{'BACKEND':'django', 'DIRS':['two']}],
+                       [{'BACKEND':'jinja2'}]]:
+            snapshot.record(main.merger_by_backend([source], templates))
+
+        self.assertEqual(2, len(templates))
+        self.assertEqual([original], snapshot.materialize())
+
+    def test_007_snapshot_equal(self):
+        "test the original of a list with an added entry equal to another."
+        import django_integrator.main
+        main = django_integrator.main
+        applications = ['django.contrib.admin', 'appy']
+        snapshot = main._Snapshot(applications)
+        for name in ['appx', 'appy']:
+            applications.append(name)
+            snapshot.record([(name, main._ABSENT)])
+
+        self.assertEqual(['django.contrib.admin', 'appy'],
+                         snapshot.materialize())
+
+    def test_007_snapshot_nested(self):
+        "test that merges leave the nested originals untouched."
+        import django_integrator.main
+        main = django_integrator.main
+        databases = {'default':{'NAME':'db', 'OPTIONS':{'timeout':1}}}
+        snapshot = main._Snapshot(databases)
+        snapshot.record(main.merger_deep(
+            [{'default':{'OPTIONS':{'timeout':2}}}], databases))
+        templates = [{'BACKEND':'django', 'OPTIONS':{'debug':False}}]
+        listed = main._Snapshot(templates)
+        listed.record(main.merger_by_backend(
+            [[{'BACKEND':'django', 'OPTIONS':{'debug':True}}]], templates))
+
+        # Changes made after the merge, and not by it, are kept.
+        databases['default']['NAME'] = 'changed'
+        databases['other'] = {}
+        self.assertEqual({'default':{'NAME':'db', 'OPTIONS':{'timeout':1}},
+                          'other':{}}, snapshot.materialize())
+        self.assertEqual([{'BACKEND':'django', 'OPTIONS':{'debug':False}}],
+                         listed.materialize())
+
+    def test_008_add_strategy(self):
+        "test registering a strategy for a custom setting."
+        import django_integrator.main
+        main = django_integrator.main
+        try:
+            main.add_strategy('CUSTOM_LIST', main.merger_unique)
+            self.assertIn('CUSTOM_LIST', main.MERGABLES)
+            self.assertIs(main.merger_unique, main.STRATEGIES['CUSTOM_LIST'])
+            main.add_strategy('CUSTOM_LIST', None)
+            self.assertNotIn('CUSTOM_LIST', main.STRATEGIES)
+        finally:
+            main.MERGABLES.remove('CUSTOM_LIST')
+
+class Test003Cache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.module = os.path.join(self.tempdir, 'cache_test_settings.py')
+        with open(self.module, 'w') as file_write:
+            file_write.write("VALUE = 1\n")
+        sys.path.insert(0, self.tempdir)
+
+    def tearDown(self):
+        sys.path.remove(self.tempdir)
+        shutil.rmtree(self.tempdir)
+
+    def test_000_roundtrip(self):
+        from django_integrator import cache
+        key = cache.digest(['cache_test_settings'])
+        directory = os.path.join(self.tempdir, 'cache')
+        self.assertTrue(cache.dump(directory, 'name', key, {'VALUE':1}))
+        self.assertEqual({'VALUE':1}, cache.load(directory, 'name', key))
+
+    def test_001_changed_source(self):
+        from django_integrator import cache
+        key = cache.digest(['cache_test_settings'])
+        directory = os.path.join(self.tempdir, 'cache')
+        cache.dump(directory, 'name', key, {'VALUE':1})
+        with open(self.module, 'a') as file_append:
+            file_append.write("OTHER = 2\n")
+
+        changed = cache.digest(['cache_test_settings'])
+        self.assertNotEqual(key, changed)
+        self.assertEqual(None, cache.load(directory, 'name', changed))
+
+    def test_002_missing(self):
+        from django_integrator import cache
+        self.assertEqual(None, cache.load(self.tempdir, 'name', 'key'))
+        self.assertFalse(cache.dump(self.tempdir, 'name', 'key', lambda: 0))
+
+    def test_003_merged_before(self):
+        import django_integrator.main
+        with open(os.path.join(self.tempdir, 'cache_project.py'), 'w') as _:
+            _.write("INSTALLED_APPS = ['base']\n")
+        with open(os.path.join(self.tempdir, 'cache_local.py'), 'w') as _:
+            _.write("INSTALLED_APPS = ['from_local_v1']\n")
+        path = os.path.join(self.tempdir, 'cache_app')
+        os.mkdir(path)
+        with open(os.path.join(path, '__init__.py'), 'w'):
+            pass
+        with open(os.path.join(path, 'settings.py'), 'w') as _:
+            _.write("INSTALLED_APPS = ['other']\n")
+
+        environ = {'DJANGO_SETTINGS_MODULE':'cache_project',
+                   'DJANGO_INTEGRATOR_CACHE':os.path.join(self.tempdir, 'c')}
+        names = ['cache_project', 'cache_local', 'cache_app.settings',
+                 'cache_app']
+        def start():
+            "Load the settings like a new process would."
+            for name in names:
+                sys.modules.pop(name, None)
+            importer = django_integrator.main._Importer()
+            importer.add('cache_local')
+            importer.call_all(['cache_app'])
+            return importer.settings['TARGET']['INSTALLED_APPS']
+
+        original = dict((name, os.environ.get(name)) for name in environ)
+        os.environ.update(environ)
+        try:
+            self.assertIn('from_local_v1', start())
+            self.assertIn('from_local_v1', start())
+            # the second start used the cache
+            self.assertNotIn('cache_app.settings', sys.modules)
+            with open(os.path.join(self.tempdir, 'cache_local.py'), 'w') as _:
+                _.write("INSTALLED_APPS = ['from_local_v2']\n")
+            applications = start()
+            self.assertIn('from_local_v2', applications)
+            self.assertNotIn('from_local_v1', applications)
+        finally:
+            for name in names:
+                sys.modules.pop(name, None)
+            for name in original:
+                if original[name] is None:
+                    os.environ.pop(name)
+                else:
+                    os.environ[name] = original[name]
+
+class Test004Freeze(unittest.TestCase):
+    def test_000_settings(self):
+        from django_integrator_script import freeze
+        values = {'DEBUG':True, 'URLCONF':'urls', 'ROOT_URLCONF':'project.urls',
+                  'BASE_DIR':freeze.pathlib.PurePosixPath('/tmp'),
+                  'INSTALLED_APPS':['one', 'two']}
+        text = freeze.render_settings('project.settings', values,
+                                      'project.urls_frozen')
+        namespace = dict()
+        exec(text, namespace) # pylint: disable=exec-used
+        self.assertEqual(True, namespace['DEBUG'])
+        self.assertEqual('project.urls_frozen', namespace['ROOT_URLCONF'])
+        self.assertEqual(values['BASE_DIR'], namespace['BASE_DIR'])
+        self.assertEqual(['one', 'two'], namespace['INSTALLED_APPS'])
+        self.assertNotIn('URLCONF', namespace)
+
+    def test_001_settings_unsupported(self):
+        from django_integrator_script import freeze
+        self.assertRaises(ValueError, freeze.render_settings,
+                          'project.settings', {'VALUE':object()}, 'urls')
+
+    def test_002_urls(self):
+        from django_integrator_script import freeze
+        text = freeze.render_urls('project.urls', ['one.urls', 'two.urls'])
+        self.assertIn('from project.urls import urlpatterns as _root', text)
+        self.assertIn('from two.urls import urlpatterns as _1', text)
+        self.assertIn('urlpatterns.extend(_1)', text)
+
+    def test_003_urls_indexed(self):
+        import types
+        from django.urls import URLResolver, path
+        from django.urls.resolvers import RegexPattern
+        from django_integrator_script import freeze
+        names = ['freeze_root', 'freeze_one', 'freeze_two']
+        for name in names:
+            module = types.ModuleType(name)
+            module.urlpatterns = [path(name + '/', lambda request: None)]
+            sys.modules[name] = module
+        self.addCleanup(lambda: [sys.modules.pop(_) for _ in names])
+
+        text = freeze.render_urls('freeze_root', ['freeze_one', 'freeze_two'],
+                                  {'freeze_one':''})
+        namespace = dict()
+        exec(text, namespace) # pylint: disable=exec-used
+        self.assertEqual(3, len(namespace['urlpatterns']))
+        resolver = URLResolver(RegexPattern(r'^/'), namespace['urlpatterns'])
+        self.assertEqual('freeze_one/',
+                         resolver.resolve('/freeze_one/').route)
+        self.assertEqual('^freeze_two/freeze_two/',
+                         resolver.resolve('/freeze_two/freeze_two/').route)
+
+class Test005Report(unittest.TestCase):
+    def test_000_disabled(self):
+        from django_integrator import report
+        record = report.Report()
+        if report.ENVIRONMENT in os.environ:
+            self.skipTest('report enabled by the environment')
+        entry = record.start('add_application', 'app')
+        entry.lap('import')
+        entry.finish(keys=1)
+        self.assertEqual([], record.entries)
+
+    def test_001_entry(self):
+        from django_integrator import report
+        record = report.Report()
+        record.active = True
+        target = {'INSTALLED_APPS':['one']}
+        entry = record.start('add_application', 'app', target,
+                             ['INSTALLED_APPS'])
+        entry.lap('import')
+        target['INSTALLED_APPS'].append('two')
+        entry.lap('merge')
+        entry.finish(keys=1)
+
+        data = record.entries[0]
+        self.assertEqual('app', data['path'])
+        self.assertEqual({'INSTALLED_APPS':1}, data['growth'])
+        self.assertEqual(1, data['keys'])
+        self.assertTrue(data['import'] >= 0 and data['merge'] >= 0)
+
+    def test_002_flush(self):
+        import json
+        from django_integrator import report
+        path = os.path.join(tempfile.mkdtemp(), 'report.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        original = os.environ.get(report.ENVIRONMENT)
+        os.environ[report.ENVIRONMENT] = path
+        try:
+            record = report.Report()
+            for name in ['one', 'two']:
+                record.start('add_application', name).finish(keys=1)
+            self.assertFalse(os.path.exists(path))
+            record.flush()
+        finally:
+            if original is None:
+                os.environ.pop(report.ENVIRONMENT)
+            else:
+                os.environ[report.ENVIRONMENT] = original
+
+        with open(path, 'r') as file_read:
+            self.assertEqual(['one', 'two'],
+                             [entry['path'] for entry in json.load(file_read)])
+
+class Test006Urls(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.names = ['urls_test_app', 'urls_test_other']
+        for name in self.names:
+            path = os.path.join(self.tempdir, name)
+            os.mkdir(path)
+            with open(os.path.join(path, '__init__.py'), 'w'):
+                pass
+            with open(os.path.join(path, 'urls.py'), 'w') as file_write:
+                file_write.write("from django.urls import path\n"
+                                 "def view(request):\n"
+                                 "    return None\n"
+                                 "urlpatterns = [path('hello/', view)]\n")
+        sys.path.insert(0, self.tempdir)
+        import django_integrator.main
+        self.patterns = django_integrator.main._PATTERNS[::]
+        self.prefixes = django_integrator.main._PREFIXES.copy()
+        django_integrator.main._PATTERNS[::] = [name + '.urls'
+                                                for name in self.names]
+        django_integrator.main._PREFIXES['urls_test_other'] = '/other/'
+
+    def tearDown(self):
+        import django_integrator.main
+        django_integrator.main._PATTERNS[::] = self.patterns
+        django_integrator.main._PREFIXES.clear()
+        django_integrator.main._PREFIXES.update(self.prefixes)
+        sys.path.remove(self.tempdir)
+        shutil.rmtree(self.tempdir)
+        for name in self.names:
+            sys.modules.pop(name + '.urls', None)
+            sys.modules.pop(name, None)
+
+    def test_000_lazy(self):
+        import django_integrator.main
+        from django.urls import URLResolver
+        from django.urls.resolvers import RegexPattern
+        patterns = list()
+        django_integrator.main.add_urlpatterns(patterns, lazy=True)
+        self.assertNotIn('urls_test_app.urls', sys.modules)
+
+        resolver = URLResolver(RegexPattern(r'^/'), patterns)
+        match = resolver.resolve('/hello/')
+        self.assertEqual('view', match.func.__name__)
+        self.assertIn('urls_test_app.urls', sys.modules)
+
+    def test_001_indexed(self):
+        import django_integrator.main
+        from django.urls import Resolver404, URLResolver
+        from django.urls.resolvers import RegexPattern
+        patterns = list()
+        django_integrator.main.add_urlpatterns(patterns, lazy=True,
+                                               indexed=True)
+        self.assertEqual(1, len(patterns))
+
+        resolver = URLResolver(RegexPattern(r'^/'), patterns)
+        match = resolver.resolve('/other/hello/')
+        self.assertEqual('^other/hello/', match.route)
+        self.assertNotIn('urls_test_app.urls', sys.modules)
+        match = resolver.resolve('/urls_test_app/hello/')
+        self.assertEqual('^urls_test_app/hello/', match.route)
+        self.assertRaises(Resolver404, resolver.resolve, '/hello/')
+
+    def test_002_clash(self):
+        from django_integrator import dispatch
+        self.assertRaises(ValueError, dispatch.build,
+                          [('one/', list()), ('/one', list())])
+
+    def test_003_preload_modules(self):
+        import django_integrator.main
+        with open(os.path.join(self.tempdir, 'urls_test_app', 'views.py'),
+                  'w') as file_write:
+            file_write.write("VIEWS = True\n")
+        try:
+            modules = django_integrator.main._preload_modules()
+            self.assertEqual(['urls_test_app.urls', 'urls_test_app.views',
+                              'urls_test_other.urls'], modules)
+            self.assertIn('urls_test_app.views', sys.modules)
+        finally:
+            sys.modules.pop('urls_test_app.views', None)
+
+    def test_004_preload_autoreload(self):
+        import django_integrator.main
+        os.environ['RUN_MAIN'] = 'true'
+        try:
+            self.assertEqual([], django_integrator.main.preload())
+        finally:
+            os.environ.pop('RUN_MAIN')
+        self.assertNotIn('urls_test_app.urls', sys.modules)
+
+    def test_005_preload(self):
+        import subprocess
+        path = os.path.join(self.tempdir, 'urls_test_app')
+        files = {os.path.join(path, 'settings.py'):"URLCONF = 'urls'\n",
+                 os.path.join(path, 'views.py'):"VIEWS = True\n",
+                 os.path.join(self.tempdir, 'preload_settings.py'):
+                 "SECRET_KEY = 'preload'\n"
+                 "DEBUG = False\n"
+                 "INSTALLED_APPS = []\n"
+                 "ROOT_URLCONF = 'preload_urls'\n"
+                 "import django_integrator\n"
+                 "django_integrator.add_application('urls_test_app')\n",
+                 os.path.join(self.tempdir, 'preload_urls.py'):
+                 "import django_integrator\n"
+                 "urlpatterns = []\n"
+                 "django_integrator.add_urlpatterns(urlpatterns, lazy=True)\n"}
+        for name in files:
+            with open(name, 'w') as file_write:
+                file_write.write(files[name])
+
+        script = ("import gc\n"
+                  "import django\n"
+                  "django.setup()\n"
+                  "import django_integrator\n"
+                  "from django.urls import get_resolver\n"
+                  "print(django_integrator.preload())\n"
+                  "print(get_resolver()._populated)\n"
+                  "print(gc.get_freeze_count() > 0)\n")
+        environ = dict(os.environ, DJANGO_SETTINGS_MODULE='preload_settings',
+                       PYTHONPATH=os.pathsep.join([
+                           self.tempdir,
+                           os.path.dirname(os.path.abspath(__file__))]))
+        environ.pop('RUN_MAIN', None)
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         cwd=self.tempdir, env=environ,
+                                         stderr=subprocess.STDOUT,
+                                         universal_newlines=True)
+        self.assertEqual("['urls_test_app.urls', 'urls_test_app.views']\n"
+                         "True\nTrue\n", output)
+
+class Test007Prefetch(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        path = os.path.join(self.tempdir, 'prefetch_test_app')
+        os.mkdir(path)
+        for name in ['__init__.py', 'settings.py']:
+            with open(os.path.join(path, name), 'w') as file_write:
+                file_write.write("VALUE = 1\n")
+        sys.path.insert(0, self.tempdir)
+
+    def tearDown(self):
+        sys.path.remove(self.tempdir)
+        shutil.rmtree(self.tempdir)
+
+    def test_000_warm(self):
+        from django_integrator import prefetch
+        found = prefetch.warm(['prefetch_test_app.settings',
+                               'prefetch_test_app.urls',
+                               'prefetch_test_missing.settings'])
+        self.assertEqual(1, found)
+        self.assertNotIn('prefetch_test_app', sys.modules)
+
+class Test008Incremental(unittest.TestCase):
+    def test_000_back_out(self):
+        from django_integrator import incremental
+        ledger = incremental.Ledger()
+        target = {'INSTALLED_APPS':['base'], 'DATABASES':{'default':0},
+                  'DEBUG':False}
+        contributions = [('one', {'INSTALLED_APPS':['base', 'one'],
+                                  'DATABASES':{'default':1}, 'DEBUG':True}),
+                         ('two', {'INSTALLED_APPS':['one', 'two'],
+                                  'DATABASES':{'other':2}})]
+        for path, values in contributions:
+            for key in values:
+                mergable = key != 'DEBUG'
+                ledger.record(path, key, values[key], target, mergable)
+                if key == 'INSTALLED_APPS':
+                    for item in values[key]:
+                        if item not in target[key]:
+                            target[key].append(item)
+                elif mergable:
+                    target[key].update(values[key])
+                else:
+                    target[key] = values[key]
+
+        changed = ledger.back_out('one', target)
+        self.assertEqual(set(['DATABASES', 'DEBUG']), changed)
+        self.assertEqual(['base', 'one', 'two'], target['INSTALLED_APPS'])
+        self.assertEqual({'default':0, 'other':2}, target['DATABASES'])
+        self.assertEqual(False, target['DEBUG'])
+
+        ledger.back_out('two', target)
+        self.assertEqual(['base'], target['INSTALLED_APPS'])
+        self.assertEqual({'default':0}, target['DATABASES'])
+
+    def test_001_order(self):
+        from django_integrator import incremental
+        ledger = incremental.Ledger()
+        target = {'DEBUG':None}
+        for path, value in [('one', 1), ('two', 2)]:
+            ledger.record(path, 'DEBUG', value, target, False)
+            target['DEBUG'] = value
+
+        ledger.back_out('one', target)
+        ledger.record('one', 'DEBUG', 3, target, False)
+        target['DEBUG'] = 3
+        ledger.settle('one', target)
+        self.assertEqual(2, target['DEBUG'])
+
+    def test_002_remerge_strategies(self):
+        import django_integrator.main
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        with open(os.path.join(tempdir, 'reload_settings.py'), 'w') as _:
+            _.write("INSTALLED_APPS = []\n"
+                    "DATABASES = {'default':{'ENGINE':'e', 'NAME':'n'}}\n"
+                    "TEMPLATES = [{'BACKEND':'b', 'OPTIONS':"
+                    "{'context_processors':['a.cp']}}]\n")
+        path = os.path.join(tempdir, 'reload_app')
+        os.mkdir(path)
+        with open(os.path.join(path, '__init__.py'), 'w'):
+            pass
+        text = ("DATABASES = {'default':{'OPTIONS':{'timeout':%s}}}\n"
+                "TEMPLATES = [{'BACKEND':'b', 'OPTIONS':"
+                "{'context_processors':['%s']}}]\n")
+        with open(os.path.join(path, 'settings.py'), 'w') as _:
+            _.write(text % (9, 'b.cp'))
+
+        sys.path.insert(0, tempdir)
+        self.addCleanup(sys.path.remove, tempdir)
+        for name in ['reload_settings', 'reload_app.settings', 'reload_app']:
+            self.addCleanup(sys.modules.pop, name, None)
+        settings_orig = os.environ.get('DJANGO_SETTINGS_MODULE', None)
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'reload_settings'
+        try:
+            importer = django_integrator.main._Importer()
+        finally:
+            if settings_orig is not None:
+                os.environ['DJANGO_SETTINGS_MODULE'] = settings_orig
+            else:
+                os.environ.pop('DJANGO_SETTINGS_MODULE')
+        importer.track()
+        importer('reload_app')
+        target = importer.settings['TARGET']
+        databases = target['DATABASES']
+
+        with open(os.path.join(path, 'settings.py'), 'w') as _:
+            _.write(text % (10, 'c.cp'))
+        changed = importer.remerge('reload_app.settings')
+
+        self.assertEqual(set(['DATABASES', 'TEMPLATES']), changed)
+        self.assertIs(databases, target['DATABASES'])
+        self.assertEqual({'default':{'ENGINE':'e', 'NAME':'n',
+                                     'OPTIONS':{'timeout':10}}},
+                         target['DATABASES'])
+        self.assertEqual(['a.cp', 'c.cp'],
+                         target['TEMPLATES'][0]['OPTIONS']
+                         ['context_processors'])
+        self.assertEqual(1, len(target['TEMPLATES']))
+
+        importer.restore('DATABASES')
+        self.assertEqual({'default':{'ENGINE':'e', 'NAME':'n'}},
+                         target['DATABASES'])
+
+class Test009Finalize(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        with open(os.path.join(self.tempdir, 'final_settings.py'), 'w') as _:
+            _.write("INSTALLED_APPS = ['base']\n"
+                    "DATABASES = {'default':{}}\n")
+        path = os.path.join(self.tempdir, 'final_app')
+        os.mkdir(path)
+        with open(os.path.join(path, '__init__.py'), 'w'):
+            pass
+        with open(os.path.join(path, 'settings.py'), 'w') as _:
+            _.write("INSTALLED_APPS = ['other']\n"
+                    "DATABASES = {'other':{}}\n")
+        sys.path.insert(0, self.tempdir)
+        self.settings_orig = os.environ.get('DJANGO_SETTINGS_MODULE', None)
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'final_settings'
+
+    def tearDown(self):
+        sys.path.remove(self.tempdir)
+        shutil.rmtree(self.tempdir)
+        for name in ['final_settings', 'final_app.settings', 'final_app']:
+            sys.modules.pop(name, None)
+        if self.settings_orig is not None:
+            os.environ['DJANGO_SETTINGS_MODULE'] = self.settings_orig
+        else:
+            os.environ.pop('DJANGO_SETTINGS_MODULE')
+
+    def test_000_finalize(self):
+        import django_integrator.main
+        importer = django_integrator.main._Importer()
+        importer('final_app')
+        final = importer.finalize()
+
+        self.assertEqual(('base', 'final_app', 'other'),
+                         importer.settings['TARGET']['INSTALLED_APPS'])
+        self.assertEqual(('base', 'final_app', 'other'),
+                         final['INSTALLED_APPS'])
+        self.assertEqual(['default', 'other'], list(final['DATABASES']))
+        # Dictionaries are not copied, the mapping holds a view of them.
+        databases = importer.settings['TARGET']['DATABASES']
+        self.assertIs(databases['default'], final['DATABASES']['default'])
+        databases['extra'] = {}
+        self.assertIn('extra', final['DATABASES'])
+        with self.assertRaises(TypeError):
+            final['DATABASES']['other'] = {}
+        with self.assertRaises(TypeError):
+            final['DEBUG'] = True
+        self.assertNotIn('final_app.settings', sys.modules)
+        self.assertRaises(RuntimeError, importer, 'final_app')
+        self.assertRaises(RuntimeError, importer.restore, 'INSTALLED_APPS')
+
+    def test_001_restore_snapshot(self):
+        import django_integrator.main
+        importer = django_integrator.main._Importer()
+        importer('final_app')
+        origin = importer.settings['ORIGIN']
+        self.assertIsInstance(origin['DATABASES'],
+                              django_integrator.main._Snapshot)
+
+        importer.restore('INSTALLED_APPS')
+        importer.restore('DATABASES')
+        target = importer.settings['TARGET']
+        self.assertEqual(['base', 'final_app'], target['INSTALLED_APPS'])
+        self.assertEqual({'default':{}}, target['DATABASES'])
+        self.assertIsNot(origin['DATABASES']['default'],
+                         target['DATABASES']['default'])
+
+    def test_002_autoreload(self):
+        import django_integrator.main
+        importer = django_integrator.main._Importer()
+        importer('final_app')
+        os.environ['RUN_MAIN'] = 'true'
+        try:
+            importer.finalize()
+        finally:
+            os.environ.pop('RUN_MAIN')
+        self.assertIn('final_app.settings', sys.modules)
+
+    def test_003_incremental(self):
+        import django_integrator.main
+        from django.utils import autoreload
+        # Earlier tests may have connected their own importer.
+        autoreload.file_changed.disconnect(dispatch_uid='django_integrator')
+        importer = django_integrator.main._Importer()
+        importer.track()
+        importer('final_app')
+        importer.finalize()
+        import pathlib
+        path = pathlib.Path(self.tempdir)
+        responses = autoreload.file_changed.send(
+            sender=None, file_path=path / 'final_app' / 'settings.py')
+        self.assertEqual([], [response for _, response in responses
+                              if response is not None])
+
+    def test_004_listed(self):
+        import django_integrator.main
+        results = list()
+        for batch in [False, True]:
+            for name in ['final_settings', 'final_app.settings', 'final_app']:
+                sys.modules.pop(name, None)
+            importer = django_integrator.main._Importer()
+            target = importer.settings['TARGET']
+            target['INSTALLED_APPS'].append('final_app')
+            if batch:
+                importer.call_all(['final_app'])
+            else:
+                importer('final_app')
+            results.append(list(target['INSTALLED_APPS']))
+
+        self.assertEqual(['base', 'final_app', 'other'], results[0])
+        self.assertEqual(results[0], results[1])
+
+class Test010Bulk(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.row = {'name':'bulk-one', 'class':'BulkOne', 'verbose':'One',
+                    'author':'Firstname Lastname',
+                    'email':'first.last@example.com'}
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_000_manifest(self):
+        from django_integrator_script import bulk
+        path = os.path.join(self.tempdir, 'manifest.csv')
+        with open(path, 'w') as file_write:
+            file_write.write(','.join(bulk.FIELDS) + '\n')
+            file_write.write(','.join(self.row[_] for _ in bulk.FIELDS) + '\n')
+        self.assertEqual([self.row], bulk.read_manifest(path))
+
+        path = os.path.join(self.tempdir, 'manifest.json')
+        with open(path, 'w') as file_write:
+            file_write.write('[{"name":"bulk-one"}]')
+        self.assertRaises(ValueError, bulk.read_manifest, path)
+
+    def test_001_create_all(self):
+        from django_integrator_script import bulk
+        created = list()
+        def mock(configuration, cwd):
+            if configuration['name'] == 'bulk-two':
+                raise ValueError('taken')
+            created.append((configuration['name'], cwd))
+
+        main_original = create.main
+        create.main = mock
+        try:
+            results = bulk.create_all([self.row,
+                                       dict(self.row, name='bulk-two')],
+                                      self.tempdir)
+        finally:
+            create.main = main_original
+
+        self.assertEqual([('bulk-one', self.tempdir)], created)
+        self.assertEqual([None, 'ValueError: taken'],
+                         [result['error'] for result in results])
+        self.assertIn('1 created, 1 failed.', bulk.summary(results))
+        self.assertRaises(ValueError, bulk.create_all, [self.row, self.row])
+
+class Test011Bundle(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_000_bundle(self):
+        from django_integrator_script import bundle
+        directory = os.path.join(os.path.dirname(create.__file__),
+                                 'templates')
+        templates = bundle.load(directory)
+        self.assertIs(templates, bundle.load(directory + os.sep))
+        text = templates.render('info_py.txt', **{'class':'Test',
+                                                  'name':'test',
+                                                  'verbose':'Test'})
+        self.assertIn("LABELS['name'] = 'test'", text)
+
+        output = bundle.Output()
+        path = os.path.join(self.tempdir, 'models.py')
+        output.add(path, templates.text('models_py.txt'), 0o500)
+        self.assertFalse(os.path.exists(path))
+        output.write()
+        with open(path, 'r') as file_read:
+            self.assertEqual(templates.text('models_py.txt'), file_read.read())
+        self.assertTrue(os.access(path, os.X_OK))
+
+class Test012Pypi(unittest.TestCase):
+    def setUp(self):
+        import http.server
+        import threading
+        requests = self.requests = list()
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self): # pylint: disable=invalid-name
+                requests.append((self.path, self.client_address))
+                if self.path.startswith('/old/'):
+                    self.send_response(301)
+                    self.send_header('Location', self.path[4:])
+                elif self.path == '/pypi/taken/json':
+                    self.send_response(200)
+                else:
+                    self.send_response(404)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, *args): # pylint: disable=arguments-differ
+                pass
+
+        self.server = http.server.HTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.tempdir)
+
+    def _client(self):
+        from django_integrator_script import pypi
+        host = '127.0.0.1:%d' % self.server.server_address[1]
+        return pypi.Client(host, scheme='http', timeout=5)
+
+    def test_000_client(self):
+        client = self._client()
+        self.assertEqual(200, client.status('/old/pypi/taken/json'))
+        self.assertEqual(404, client.status('/pypi/free/json'))
+        client.close()
+        # all requests went over the same connection
+        self.assertEqual(3, len(self.requests))
+        self.assertEqual(1, len(set(_[1] for _ in self.requests)))
+
+    def test_001_cache(self):
+        from django_integrator_script import pypi
+        checker = pypi.Checker(self._client(), cache=self.tempdir)
+        self.assertTrue(checker.exists('taken'))
+        self.assertFalse(checker.exists('free'))
+        self.assertTrue(checker.exists('Taken'))
+        self.assertEqual(2, len(self.requests))
+
+        checker = pypi.Checker(self._client(), cache=self.tempdir)
+        self.assertTrue(checker.exists('taken'))
+        self.assertEqual(2, len(self.requests))
+
+        checker = pypi.Checker(self._client(), cache=self.tempdir, expiry=0)
+        self.assertTrue(checker.exists('taken'))
+        self.assertEqual(3, len(self.requests))
+
+    def test_002_index(self):
+        from django_integrator_script import pypi
+        path = os.path.join(self.tempdir, 'simple.html')
+        with open(path, 'w') as file_write:
+            file_write.write('<html><body><a href="/simple/django/">Django'
+                             '</a>\n<a href="/simple/zope-interface/">'
+                             'zope.interface</a></body></html>')
+
+        checker = pypi.Checker(self._client(), index=pypi.read_index(path))
+        self.assertTrue(checker.exists('django'))
+        self.assertTrue(checker.exists('Zope_Interface'))
+        self.assertFalse(checker.exists('taken'))
+        self.assertEqual(0, len(self.requests))
+
+class Test013Templates(unittest.TestCase):
+    def setUp(self):
+        self.cfg = {'name':'django-integrator-testname',
+                    'class':'DjangoIntegratorTestname',
+                    'verbose':'Test Application',
+                    'author':'Firstname Lastname',
+                    'email':'first.last@example.com'}
+        self.tempdir = tempfile.mkdtemp()
+        _clone(self.cfg, self.tempdir)
+        self.app = os.path.join(self.cfg['dir'], self.cfg['django_app_name'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def _load(self, name, path):
+        "Import the generated module at path as name."
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        self.addCleanup(sys.modules.pop, name, None)
+        spec.loader.exec_module(module)
+        return module
+
+    def test_000_sanitize(self):
+        sanitize = self._load('sanitize_test', os.path.join(
+            self.app, 'tools', 'sanitize.py'))
+        sanitize.PROJECT_CHECKS = {'passes':['-c', 'pass'],
+                                   'fails':['-c', 'raise SystemExit(1)']}
+        # pylint results depend on the imported modules, compile results not
+        paths = dict((name, os.path.join(self.app, 'models', name + '.py'))
+                     for name in ['one', 'two', 'three'])
+        sources = {'one':'from . import two\n', 'two':'VALUE = 1\n',
+                   'three':'VALUE = 3\n'}
+        for name in paths:
+            with open(paths[name], 'w') as file_write:
+                file_write.write(sources[name])
+        def keys(name):
+            "Return the compile and pylint keys of the module name."
+            hashes = dict((path, sanitize._hash(path))
+                          for path in paths.values())
+            contexts = sanitize._contexts(list(paths.values()), hashes, '')
+            return [sanitize._current(check, paths[name], hashes, contexts)
+                    for check in ['compile', 'pylint']]
+
+        before = keys('one')
+        with open(paths['three'], 'w') as file_write:
+            file_write.write('VALUE = 4\n')
+        self.assertEqual(before, keys('one'))
+        with open(paths['two'], 'w') as file_write:
+            file_write.write('VALUE = 2\n')
+        self.assertEqual(before[0], keys('one')[0])
+        self.assertNotEqual(before[1], keys('one')[1])
+        for path in paths.values():
+            os.remove(path)
+        sanitize.FILE_CHECKS.pop('pylint')
+
+        rows, failures = sanitize.run(workers=2)
+        rows = dict((row[0], row) for row in rows)
+        count = rows['compile'][1]
+        self.assertLess(0, count)
+        self.assertEqual([1, 0, 0], rows['passes'][1:4])
+        self.assertEqual([1, 0, 1], rows['fails'][1:4])
+        self.assertEqual(['fails'], [failure[0] for failure in failures])
+
+        rows, failures = sanitize.run(workers=2)
+        rows = dict((row[0], row) for row in rows)
+        self.assertEqual([0, count, 0], rows['compile'][1:4])
+        self.assertEqual([0, 1, 0], rows['passes'][1:4])
+        self.assertEqual([1, 0, 1], rows['fails'][1:4])
+
+        with open(os.path.join(self.app, 'models', 'broken.py'), 'w') as _:
+            _.write('def broken(:\n')
+        rows, failures = sanitize.run(workers=2)
+        rows = dict((row[0], row) for row in rows)
+        self.assertEqual([1, count, 1], rows['compile'][1:4])
+        self.assertEqual([1, 0, 0], rows['passes'][1:4])
+        self.assertEqual([1, 0, 1], rows['fails'][1:4])
+
+        with open(os.path.join(self.cfg['dir'], 'interface', 'settings.py'),
+                  'a') as file_append:
+            file_append.write('\nDEBUG = False\n')
+        rows, failures = sanitize.run(workers=2)
+        rows = dict((row[0], row) for row in rows)
+        self.assertEqual([0, count + 1, 1], rows['compile'][1:4])
+        self.assertEqual([1, 0, 0], rows['passes'][1:4])
+        self.assertEqual(['compile:' + os.path.join(
+            self.cfg['django_app_name'], 'models', 'broken.py'), 'fails'],
+                         [failure[0] for failure in failures])
+
+    def test_001_models(self):
+        import subprocess
+        with open(os.path.join(self.app, 'models', '__init__.py'), 'a') as _:
+            _.write("\nclass Thing(models.Model):\n"
+                    "    name = models.CharField(max_length=8)\n")
+        script = ("import django\n"
+                  "django.setup()\n"
+                  "from %s.tools.models import *\n"
+                  "from %s.tools import models\n"
+                  "print(Thing.__name__, sorted(models.ALL))\n")
+        script = script % ((self.cfg['django_app_name'],) * 2)
+        environ = dict(os.environ, DJANGO_SETTINGS_MODULE='interface.settings',
+                       PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         cwd=self.cfg['dir'], env=environ,
+                                         universal_newlines=True)
+        self.assertEqual("Thing ['Thing']\n", output)
+
+    def test_004_ready(self):
+        import subprocess
+        # Django before 4.1 uses the generated config, its ready() has to
+        # leave the command line alone.
+        script = ("import sys\n"
+                  "import django\n"
+                  "django.setup()\n"
+                  "import %s as application\n"
+                  "config = getattr(application, '%s')\n"
+                  "sys.argv = ['manage.py', 'runserver']\n"
+                  "config('%s', application).ready()\n"
+                  "print('ready')\n")
+        script = script % (self.cfg['django_app_name'], self.cfg['class'],
+                           self.cfg['django_app_name'])
+        environ = dict(os.environ, DJANGO_SETTINGS_MODULE='interface.settings',
+                       PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         cwd=self.cfg['dir'], env=environ,
+                                         stderr=subprocess.STDOUT,
+                                         universal_newlines=True)
+        self.assertEqual('ready\n', output)
+
+    def _devset(self, script):
+        "Run script with the generated devset module, return its output."
+        import subprocess
+        script = "import sys\nimport devset\n" + script
+        environ = dict(os.environ,
+                       PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        environ.pop('DJANGO_SETTINGS_MODULE', None)
+        return subprocess.check_output([sys.executable, '-c', script],
+                                       cwd=self.cfg['dir'], env=environ,
+                                       stderr=subprocess.STDOUT,
+                                       universal_newlines=True)
+
+    def test_002_devset_reset(self):
+        import sqlite3
+        # The reset runs in this process, without management subprocesses.
+        output = self._devset("import subprocess\n"
+                              "subprocess.Popen = None\n"
+                              "devset.reset()\n"
+                              "print('key', devset.snapshot_key())\n")
+        self.assertIn('makemigrations', output)
+        key = output.split('key ')[-1].strip()
+        self.assertTrue(os.path.isfile(os.path.join(
+            self.cfg['dir'], '.devset', key + '.sqlite3')))
+
+        connection = sqlite3.connect(os.path.join(self.cfg['dir'],
+                                                  'db.sqlite3'))
+        try:
+            rows = connection.execute('SELECT username, is_superuser '
+                                      'FROM auth_user').fetchall()
+        finally:
+            connection.close()
+        self.assertEqual([('admin', 1)], rows)
+
+    def test_003_devset_snapshot(self):
+        database = os.path.join(self.cfg['dir'], 'db.sqlite3')
+        stub = "devset.run_server = lambda: print('server')\n"
+        self._devset("devset.reset()\n")
+        os.remove(database)
+
+        output = self._devset(stub + "devset.main()\n")
+        self.assertIn('restore snapshot', output)
+        self.assertNotIn('migrate', output)
+        self.assertIn('server', output)
+        self.assertTrue(os.path.isfile(database))
+
+        output = self._devset(stub + "sys.argv.append('--rebuild')\n"
+                              "devset.main()\n")
+        self.assertNotIn('restore snapshot', output)
+        self.assertIn('migrate', output)
+        self.assertIn('server', output)
+
+        # A changed model invalidates the snapshot.
+        with open(os.path.join(self.app, 'models', '__init__.py'), 'a') as _:
+            _.write("\n# changed\n")
+        output = self._devset(stub + "devset.main()\n")
+        self.assertIn('migrate', output)
 
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']